@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, ProviderProfile, CustomerProfile, Service, Material, AdminProfile, AuditLog, Notification
+from .models import User, ProviderProfile, CustomerProfile, Service, Material, AdminProfile, AuditLog, Notification, ArchiveManifest
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -51,4 +51,10 @@ class NotificationAdmin(admin.ModelAdmin):
     list_display = ('id', 'recipient', 'type', 'message', 'read', 'timestamp')
     search_fields = ('recipient__username', 'type', 'message')
     list_filter = ('type', 'read')
-    ordering = ('-timestamp',) 
\ No newline at end of file
+    ordering = ('-timestamp',)
+
+@admin.register(ArchiveManifest)
+class ArchiveManifestAdmin(admin.ModelAdmin):
+    list_display = ('id', 'model', 'month', 'part', 'row_count', 'path', 'created_at')
+    list_filter = ('model',)
+    ordering = ('-month',)
@@ -0,0 +1,94 @@
+import atexit
+import logging
+import threading
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+# 'buffered' writes audit entries behind the request in batches; 'sync' inserts them in the request's
+# own transaction, so an entry commits if and only if the change it records does.
+AUDIT_LOG_MODE = getattr(settings, 'AUDIT_LOG_MODE', 'buffered')
+AUDIT_BUFFER_SIZE = getattr(settings, 'AUDIT_BUFFER_SIZE', 500)
+AUDIT_FLUSH_INTERVAL = getattr(settings, 'AUDIT_FLUSH_INTERVAL', 2.0)  # seconds
+
+
+def audit_entry(user, action, target_type, target_id=None, details=None):
+    return AuditLog(
+        user=user if getattr(user, 'pk', None) else None,
+        action=action,
+        target_type=target_type,
+        target_id=target_id,
+        details=dict(details or {}),
+    )
+
+
+class SyncAuditSink:
+    def log(self, entries):
+        AuditLog.objects.bulk_create(entries)
+
+    def flush(self):
+        return 0
+
+
+class BufferedAuditSink:
+    """Collects committed audit entries and writes them with bulk_create when the buffer fills or ages.
+
+    A daemon thread flushes every `interval` seconds, and whatever is left is flushed at interpreter exit.
+    """
+
+    def __init__(self, size=AUDIT_BUFFER_SIZE, interval=AUDIT_FLUSH_INTERVAL):
+        self.size = size
+        self.interval = interval
+        self.buffer = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def log(self, entries):
+        # Entries of a rolled back transaction are never written
+        transaction.on_commit(lambda: self.enqueue(entries))
+
+    def enqueue(self, entries):
+        with self._lock:
+            self.buffer.extend(entries)
+            full = len(self.buffer) >= self.size
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name='audit-writer', daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            entries, self.buffer = self.buffer, []
+        if not entries:
+            return 0
+        try:
+            AuditLog.objects.bulk_create(entries, batch_size=self.size)
+        except Exception:
+            logger.exception('Failed to write %d audit log entries', len(entries))
+            with self._lock:
+                # Retry with the next flush, keeping the buffer bounded
+                self.buffer[:0] = entries[:max(0, self.size * 10 - len(self.buffer))]
+            return 0
+        return len(entries)
+
+    def run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+audit_sink = SyncAuditSink() if AUDIT_LOG_MODE == 'sync' else BufferedAuditSink()
+
+
+def log_admin_actions(user, action, target_type, targets):
+    """Record one audit entry per (target_id, details) pair with a single sink call."""
+    audit_sink.log([audit_entry(user, action, target_type, target_id, details) for target_id, details in targets])
@@ -0,0 +1,48 @@
+from datetime import datetime
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_minute(value):
+    hours, _, minutes = str(value).partition(':')
+    return int(hours) * 60 + int(minutes or 0)
+
+
+def availability_windows(availability):
+    """Normalize {'Monday': [{'from': '10:00', 'to': '18:00'}]} into (weekday, start, end) minute ranges."""
+    windows = set()
+    for day, slots in (availability or {}).items():
+        if day not in WEEKDAYS:
+            continue
+        weekday = WEEKDAYS.index(day)
+        for slot in slots or []:
+            try:
+                start, end = parse_minute(slot['from']), parse_minute(slot['to'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if start < end:
+                windows.add((weekday, start, end))
+            elif start > end:
+                # Overnight slot spills into the next day
+                windows.add((weekday, start, MINUTES_PER_DAY))
+                if end:
+                    windows.add(((weekday + 1) % 7, 0, end))
+    return windows
+
+
+def requested_datetime(value):
+    if value is None or isinstance(value, datetime):
+        moment = value
+    else:
+        moment = parse_datetime(str(value))
+    if moment is not None and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def weekday_minute(moment):
+    local = timezone.localtime(moment)
+    return local.weekday(), local.hour * 60 + local.minute
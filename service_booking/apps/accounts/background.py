@@ -0,0 +1,27 @@
+import asyncio
+import threading
+
+
+class BackgroundLoop:
+    """An asyncio event loop running in a daemon thread, for work handed off by sync views."""
+
+    def __init__(self, name):
+        self.name = name
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def get_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True).start()
+        return self._loop
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.get_loop())
+
+    def call_soon(self, callback, *args):
+        self.get_loop().call_soon_threadsafe(callback, *args)
+
+
+background_loop = BackgroundLoop('background-loop')
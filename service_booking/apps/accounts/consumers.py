@@ -3,39 +3,106 @@ from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from .models import Notification
+from .roles import role_resolver, connection_groups
+from .notifications import notification_payload
+from .presence import presence
 
 User = get_user_model()
 
+RESUME_CHUNK_SIZE = 200
+MAX_ACK_IDS = 1000
+# Ids already delivered on this connection, kept so the backfill and live events never repeat each other
+MAX_SENT_IDS = 1000
+
 class NotificationConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):
         user = self.scope['user']
         if user.is_authenticated:
-            if hasattr(user, 'provider_profile'):
-                await self.channel_layer.group_add(f'provider_{user.id}', self.channel_name)
-            elif hasattr(user, 'customer_profile'):
-                await self.channel_layer.group_add(f'user_{user.id}', self.channel_name)
-            if user.is_staff:
-                await self.channel_layer.group_add(f'admin_{user.id}', self.channel_name)
+            self.sent_ids = set()
+            roles = (await role_resolver.aresolve([user.id]))[user.id]
+            self.joined_groups = connection_groups(roles)
+            for group in self.joined_groups:
+                await self.channel_layer.group_add(group, self.channel_name)
             await self.accept()
+            await presence.connect(user.id)
         else:
             await self.close()
 
     async def disconnect(self, close_code):
-        user = self.scope['user']
-        if user.is_authenticated:
-            if hasattr(user, 'provider_profile'):
-                await self.channel_layer.group_discard(f'provider_{user.id}', self.channel_name)
-            elif hasattr(user, 'customer_profile'):
-                await self.channel_layer.group_discard(f'user_{user.id}', self.channel_name)
-            if user.is_staff:
-                await self.channel_layer.group_discard(f'admin_{user.id}', self.channel_name)
+        for group in getattr(self, 'joined_groups', []):
+            await self.channel_layer.group_discard(group, self.channel_name)
+        if hasattr(self, 'joined_groups'):
+            await presence.disconnect(self.scope['user'].id)
 
     async def receive_json(self, content):
-        # Optionally handle mark as read, etc.
-        pass
+        event = content.get('type')
+        if event == 'ping':
+            await presence.ping(self.scope['user'].id)
+            await self.send_json({'type': 'pong'})
+        elif event == 'resume':
+            try:
+                last_id = int(content.get('last_id') or 0)
+            except (TypeError, ValueError):
+                await self.send_json({'type': 'error', 'detail': 'last_id must be an integer.'})
+                return
+            await self.resume(last_id)
+        elif event == 'ack':
+            try:
+                ids = [int(i) for i in (content.get('ids') or [])[:MAX_ACK_IDS]]
+            except (TypeError, ValueError):
+                await self.send_json({'type': 'error', 'detail': 'ids must be a list of integers.'})
+                return
+            await self.acknowledge(ids)
+
+    @database_sync_to_async
+    def notifications_after(self, last_id):
+        rows = Notification.objects.filter(
+            recipient_id=self.scope['user'].id,
+            id__gt=last_id,
+        ).order_by('id')[:RESUME_CHUNK_SIZE]
+        return [notification_payload(n) for n in rows]
+
+    @database_sync_to_async
+    def mark_read(self, ids):
+        return Notification.objects.filter(
+            recipient_id=self.scope['user'].id,
+            id__in=ids,
+            read=False,
+        ).update(read=True)
+
+    def remember_sent(self, ids):
+        self.sent_ids.update(ids)
+        if len(self.sent_ids) > 2 * MAX_SENT_IDS:
+            self.sent_ids = set(sorted(self.sent_ids)[-MAX_SENT_IDS:])
+
+    async def resume(self, last_id):
+        # Live events may arrive before the client asks to resume, and ids aren't allocated in commit
+        # order, so de-duplicate on ids already sent rather than on the cursor: live events that were
+        # sent are skipped here, and a live event is only dropped if the backfill already sent its row.
+        cursor = last_id
+        while True:
+            chunk = await self.notifications_after(cursor)
+            if not chunk:
+                break
+            cursor = chunk[-1]['id']
+            unsent = [n for n in chunk if n['id'] not in self.sent_ids]
+            if unsent:
+                await self.send_json({'type': 'notifications', 'notifications': unsent})
+            self.remember_sent(n['id'] for n in unsent)
+            if len(chunk) < RESUME_CHUNK_SIZE:
+                break
+        await self.send_json({'type': 'resumed', 'last_id': cursor})
+
+    async def acknowledge(self, ids):
+        updated = await self.mark_read(ids) if ids else 0
+        await self.send_json({'type': 'ack', 'updated': updated})
 
     async def notify(self, event):
+        notification_id = event['notification']['id']
+        if notification_id in self.sent_ids:
+            return
         await self.send_json({
             'type': 'notification',
             'notification': event['notification']
-        }) 
\ No newline at end of file
+        })
+        self.remember_sent([notification_id])
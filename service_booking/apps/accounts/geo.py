@@ -0,0 +1,68 @@
+import math
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # ~5m cells, stored on ProviderProfile.geohash
+KM_PER_DEGREE = 111.32
+
+
+def location_coordinates(location):
+    # Accept both {'coordinates': {'lat', 'lng'}} and {'latitude', 'longitude'}
+    if not location:
+        return None, None
+    coords = location.get('coordinates') or {}
+    lat = coords.get('lat', location.get('latitude'))
+    lng = coords.get('lng', location.get('longitude'))
+    if lat is None or lng is None:
+        return None, None
+    return float(lat), float(lng)
+
+
+def encode_geohash(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, ch, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch = ch << 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[ch])
+            bits, ch = 0, 0
+    return ''.join(chars)
+
+
+def cell_size_degrees(precision):
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def covered_radius_km(lat, precision):
+    """Radius around a point that is fully covered by its 3x3 cell block."""
+    lat_deg, lng_deg = cell_size_degrees(precision)
+    widest_lat = min(90.0, abs(lat) + lat_deg)
+    return min(lat_deg * KM_PER_DEGREE, lng_deg * KM_PER_DEGREE * math.cos(math.radians(widest_lat)))
+
+
+def neighbour_cells(lat, lng, precision):
+    """Geohash of the cell containing the point plus its eight neighbours."""
+    lat_deg, lng_deg = cell_size_degrees(precision)
+    cells = set()
+    for dlat in (-lat_deg, 0, lat_deg):
+        for dlng in (-lng_deg, 0, lng_deg):
+            n_lat = max(-90.0, min(90.0, lat + dlat))
+            n_lng = (lng + dlng + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(n_lat, n_lng, precision))
+    return sorted(cells)
+
+
+def prefix_bounds(prefix):
+    # Geohash prefixes map to contiguous ranges, so a btree range scan works
+    return prefix, prefix + '~'
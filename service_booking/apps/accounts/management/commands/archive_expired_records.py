@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from service_booking.apps.accounts.retention import ARCHIVED_MODELS, ARCHIVE_ROOT, archive_month, expired_months, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Move AuditLog and Notification rows past retention into monthly gzipped JSONL archives.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=sorted(ARCHIVED_MODELS), action='append')
+        parser.add_argument('--archive-root', default=ARCHIVE_ROOT)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        for name in options['model'] or sorted(ARCHIVED_MODELS):
+            months = expired_months(name)
+            self.stdout.write(f'{name}: {len(months)} months before {retention_cutoff(name):%Y-%m} to archive.')
+            if options['dry_run']:
+                continue
+            for month in months:
+                archived, deleted = archive_month(name, month, root=options['archive_root'], chunk_size=options['chunk_size'])
+                self.stdout.write(f'  {month:%Y-%m}: archived {archived}, deleted {deleted}.')
+        self.stdout.write(self.style.SUCCESS('Archiving complete.'))
@@ -0,0 +1,51 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+from service_booking.apps.accounts.models import User
+from service_booking.apps.accounts.views import ProviderProfileViewSet, CustomerProfileViewSet, NotificationViewSet
+from service_booking.apps.bookings.views import BookingViewSet
+
+VIEWSETS = {
+    'bookings': BookingViewSet,
+    'providers': ProviderProfileViewSet,
+    'customers': CustomerProfileViewSet,
+    'notifications': NotificationViewSet,
+}
+
+class Command(BaseCommand):
+    help = 'Measure admin list payload size and render time with full and compact (list-mode) serializers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def render(self, viewset, user, params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=user)
+        view = viewset.as_view({'get': 'list'})
+        best, size = float('inf'), 0
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            response = view(request)
+            payload = json.dumps(response.data, default=str)
+            best = min(best, time.perf_counter() - start)
+            size = len(payload.encode())
+        return best, size
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        admin = User.objects.filter(is_staff=True).first()
+        if admin is None:
+            self.stderr.write(self.style.ERROR('Need a staff user to call the admin endpoints.'))
+            return
+        self.stdout.write(f'{"endpoint":<14} {"full KB":>9} {"compact KB":>11} {"full ms":>9} {"compact ms":>11}')
+        for name, viewset in VIEWSETS.items():
+            page = {'page_size': options['page_size']}
+            all_fields = ','.join(viewset.serializer_class.Meta.fields)
+            full_time, full_size = self.render(viewset, admin, dict(page, fields=all_fields, expand='user,recipient,service,customer,provider'))
+            compact_time, compact_size = self.render(viewset, admin, page)
+            self.stdout.write(
+                f'{name:<14} {full_size / 1024:>9.1f} {compact_size / 1024:>11.1f} '
+                f'{full_time * 1000:>9.1f} {compact_time * 1000:>11.1f}'
+            )
@@ -0,0 +1,57 @@
+import time
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from service_booking.apps.accounts.models import Notification
+from service_booking.apps.accounts.notifications import notify_many, notification_payload, pipeline
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Compare per-row notification insert + broadcast with the batched notify_many pipeline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=2000)
+        parser.add_argument('--recipients', type=int, default=50)
+
+    def legacy_notify(self, channel_layer, user, index):
+        # Mirrors the old post_save receiver: profile probes and a blocking group_send per row
+        notification = Notification.objects.create(recipient=user, type='benchmark', message=f'Benchmark {index}')
+        recipient = notification.recipient
+        if hasattr(recipient, 'provider_profile'):
+            group = f'provider_{recipient.id}'
+        elif hasattr(recipient, 'customer_profile'):
+            group = f'user_{recipient.id}'
+        elif recipient.is_staff:
+            group = f'admin_{recipient.id}'
+        else:
+            group = None
+        if group:
+            async_to_sync(channel_layer.group_send)(group, {'type': 'notify', 'notification': notification_payload(notification)})
+
+    def handle(self, *args, **options):
+        count = options['count']
+        users = list(User.objects.all()[:options['recipients']])
+        if not users:
+            raise CommandError('Need at least one user to notify.')
+        channel_layer = get_channel_layer()
+        try:
+            start = time.perf_counter()
+            for i in range(count):
+                self.legacy_notify(channel_layer, User.objects.get(id=users[i % len(users)].id), i)
+            legacy = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with transaction.atomic():
+                notify_many([
+                    Notification(recipient=users[i % len(users)], type='benchmark', message=f'Benchmark {i}')
+                    for i in range(count)
+                ])
+            pipeline.flush()
+            batched = time.perf_counter() - start
+        finally:
+            Notification.objects.filter(type='benchmark').delete()
+        self.stdout.write(f'per-row signal path: {count / legacy:>10.0f} notifications/s ({legacy:.2f}s)')
+        self.stdout.write(f'notify_many pipeline: {count / batched:>10.0f} notifications/s ({batched:.2f}s)')
@@ -0,0 +1,84 @@
+import json
+from decimal import Decimal, InvalidOperation
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+from service_booking.apps.accounts.models import ProviderProfile, CustomerProfile, ProviderActivity, ProviderPayment, CustomerPayment
+
+
+def entry_amount(entry):
+    try:
+        return Decimal(str(entry['amount'])).quantize(Decimal('0.01'))
+    except (KeyError, TypeError, InvalidOperation):
+        return None
+
+
+def activity_entry(provider_id, entry):
+    return ProviderActivity(provider_id=provider_id, month=str(entry.get('month', ''))[:7], details=entry)
+
+
+def provider_payment_entry(provider_id, entry):
+    return ProviderPayment(provider_id=provider_id, amount=entry_amount(entry), details=entry)
+
+
+def customer_payment_entry(customer_id, entry):
+    return CustomerPayment(customer_id=customer_id, amount=entry_amount(entry), details=entry)
+
+
+# (profile model, legacy JSON column, history model, entry builder)
+LEGACY_COLUMNS = [
+    (ProviderProfile, 'monthly_activity', ProviderActivity, activity_entry),
+    (ProviderProfile, 'payment_history', ProviderPayment, provider_payment_entry),
+    (CustomerProfile, 'payment_history', CustomerPayment, customer_payment_entry),
+]
+
+class Command(BaseCommand):
+    help = 'Stream legacy JSON history columns on profiles into their append-only tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def legacy_columns(self, table):
+        with connection.cursor() as cursor:
+            return {column.name for column in connection.introspection.get_table_description(cursor, table)}
+
+    def migrate_column(self, model, column, history, build, batch_size):
+        """Copy one column batch by batch, emptying each copied cell in the same transaction so reruns resume."""
+        table = connection.ops.quote_name(model._meta.db_table)
+        quoted = connection.ops.quote_name(column)
+        copied, last_id = 0, 0
+        while True:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"SELECT id, {quoted} FROM {table} WHERE id > %s ORDER BY id LIMIT %s",
+                        [last_id, batch_size],
+                    )
+                    rows = cursor.fetchall()
+                    if not rows:
+                        return copied
+                    last_id = rows[-1][0]
+                    entries, emptied = [], []
+                    for profile_id, value in rows:
+                        if isinstance(value, (str, bytes)):
+                            value = json.loads(value or '[]')
+                        if not value:
+                            continue
+                        entries.extend(build(profile_id, entry if isinstance(entry, dict) else {'value': entry}) for entry in value)
+                        emptied.append(profile_id)
+                    if not emptied:
+                        continue
+                    history.objects.bulk_create(entries, batch_size=batch_size)
+                    cursor.execute(
+                        f"UPDATE {table} SET {quoted} = %s WHERE id IN ({', '.join(['%s'] * len(emptied))})",
+                        ['[]', *emptied],
+                    )
+                    copied += len(entries)
+
+    def handle(self, *args, **options):
+        for model, column, history, build in LEGACY_COLUMNS:
+            if column not in self.legacy_columns(model._meta.db_table):
+                self.stdout.write(f'{model._meta.db_table}.{column} is already gone, skipping.')
+                continue
+            copied = self.migrate_column(model, column, history, build, options['batch_size'])
+            self.stdout.write(f'{model._meta.db_table}.{column}: copied {copied} entries.')
+        self.stdout.write(self.style.SUCCESS('Legacy histories migrated; the legacy_* profile fields can now be removed.'))
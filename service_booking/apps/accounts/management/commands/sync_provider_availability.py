@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from service_booking.apps.accounts.models import ProviderProfile, sync_availability_windows
+
+class Command(BaseCommand):
+    help = 'Rebuild normalized availability windows from ProviderProfile.availability.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = 0
+        providers = ProviderProfile.objects.only('id', 'availability').order_by('id')
+        for provider in providers.iterator(chunk_size=options['chunk_size']):
+            sync_availability_windows(provider)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Synced availability for {count} providers.'))
@@ -0,0 +1,34 @@
+import threading
+from collections import deque
+
+
+class LatencyRecorder:
+    """Keeps the most recent latency samples (in seconds) and reports percentiles in milliseconds."""
+
+    def __init__(self, max_samples=10000):
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.total += 1
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            total = self.total
+        if not samples:
+            return {'count': total, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+
+        def percentile(q):
+            return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+
+        return {
+            'count': total,
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': round(samples[-1] * 1000, 2),
+        }
@@ -1,9 +1,12 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from django.utils import timezone
+from .geo import encode_geohash, location_coordinates
+from .availability import availability_windows
+from .roles import role_resolver
 
 User = get_user_model()
 
@@ -23,16 +26,26 @@ class ProviderProfile(models.Model):
     service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='providers')
     is_available = models.BooleanField(default=True)
     location = models.JSONField(default=dict, blank=True)  # {'city': str, 'coordinates': {'lat': float, 'lng': float}}
+    # Denormalized from location on save so matching can use the geo index
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default='')
     assigned_bookings = models.ManyToManyField('bookings.Booking', blank=True, related_name='assigned_providers')
-    rating = models.FloatField(default=0.0)
+    rating = models.FloatField(default=0.0)  # Time-decayed average, see bookings.ratings
     total_jobs_completed = models.PositiveIntegerField(default=0)
-    # Salary details as JSON
+    # Running rating aggregates, updated incrementally as bookings are rated
+    rating_sum = models.FloatField(default=0.0)
+    rating_count = models.PositiveIntegerField(default=0)
+    decayed_rating_sum = models.FloatField(default=0.0)
+    decayed_rating_weight = models.FloatField(default=0.0)
+    # Salary details as JSON; monthly activity and payment history live in their own tables
     salary_details = models.JSONField(default=dict, blank=True)  # {'baseSalary': 0, ...}
-    monthly_activity = models.JSONField(default=list, blank=True)  # [{'month': str, ...}]
-    payment_history = models.JSONField(default=list, blank=True)  # [{'amount': 0, ...}]
+    # Legacy JSON columns, kept until migrate_profile_histories has copied them out; drop them after that
+    legacy_monthly_activity = models.JSONField(db_column='monthly_activity', default=list, blank=True, editable=False)
+    legacy_payment_history = models.JSONField(db_column='payment_history', default=list, blank=True, editable=False)
     refresh_token = models.CharField(max_length=255, blank=True, null=True)
     is_approved = models.BooleanField(default=False)
-    last_active = models.DateTimeField(auto_now=True)
+    last_active = models.DateTimeField(default=timezone.now)  # Written in batches by presence
     availability = models.JSONField(default=dict, blank=True)  # {'Monday': [{'from': '10:00', 'to': '18:00'}]}
 
     def __str__(self):
@@ -41,6 +54,32 @@ class ProviderProfile(models.Model):
     class Meta:
         verbose_name = 'Provider Profile'
         verbose_name_plural = 'Provider Profiles'
+        indexes = [
+            models.Index(
+                fields=['service', 'geohash', 'rating'],
+                name='provider_match_geo_idx',
+                condition=Q(is_available=True, is_approved=True),
+            ),
+            models.Index(fields=['-rating', '-last_active', '-id'], name='provider_rating_active_idx'),
+            models.Index(fields=['-last_active', '-id'], name='provider_last_active_idx'),
+        ]
+
+class ProviderAvailabilityWindow(models.Model):
+    # Normalized copy of ProviderProfile.availability, rebuilt when it changes
+    provider = models.ForeignKey(ProviderProfile, on_delete=models.CASCADE, related_name='availability_windows')
+    weekday = models.PositiveSmallIntegerField()  # 0 = Monday
+    start_minute = models.PositiveSmallIntegerField()
+    end_minute = models.PositiveSmallIntegerField()
+
+    def __str__(self):
+        return f"{self.provider_id} {self.weekday} {self.start_minute}-{self.end_minute}"
+
+    class Meta:
+        verbose_name = 'Provider Availability Window'
+        verbose_name_plural = 'Provider Availability Windows'
+        indexes = [
+            models.Index(fields=['provider', 'weekday', 'start_minute', 'end_minute'], name='provider_window_idx'),
+        ]
 
 class CustomerProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='customer_profile')
@@ -49,9 +88,10 @@ class CustomerProfile(models.Model):
     address = models.CharField(max_length=255, blank=True)
     location = models.JSONField(default=dict, blank=True)  # {'city': str, 'coordinates': {'lat': float, 'lng': float}}
     booking_history = models.ManyToManyField('bookings.Booking', blank=True, related_name='customer_histories')
-    payment_history = models.JSONField(default=list, blank=True)  # [{'amount': 0, ...}]
+    # Legacy JSON column, kept until migrate_profile_histories has copied it out; drop it after that
+    legacy_payment_history = models.JSONField(db_column='payment_history', default=list, blank=True, editable=False)
     refresh_token = models.CharField(max_length=255, blank=True, null=True)
-    last_active = models.DateTimeField(auto_now=True)
+    last_active = models.DateTimeField(default=timezone.now)  # Written in batches by presence
 
     def __str__(self):
         return f"{self.user.username} ({self.phone})"
@@ -59,6 +99,58 @@ class CustomerProfile(models.Model):
     class Meta:
         verbose_name = 'Customer Profile'
         verbose_name_plural = 'Customer Profiles'
+        indexes = [
+            models.Index(fields=['-last_active', '-id'], name='customer_last_active_idx'),
+        ]
+
+class ProviderActivity(models.Model):
+    provider = models.ForeignKey(ProviderProfile, on_delete=models.CASCADE, related_name='monthly_activity')
+    month = models.CharField(max_length=7, blank=True)  # 'YYYY-MM'
+    details = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.provider_id} activity {self.month}"
+
+    class Meta:
+        verbose_name = 'Provider Activity'
+        verbose_name_plural = 'Provider Activity'
+        indexes = [
+            models.Index(fields=['provider', '-id'], name='provider_activity_idx'),
+            models.Index(fields=['provider', 'month'], name='provider_activity_month_idx'),
+        ]
+
+class ProviderPayment(models.Model):
+    provider = models.ForeignKey(ProviderProfile, on_delete=models.CASCADE, related_name='payment_history')
+    amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    details = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.provider_id} payment {self.amount}"
+
+    class Meta:
+        verbose_name = 'Provider Payment'
+        verbose_name_plural = 'Provider Payments'
+        indexes = [
+            models.Index(fields=['provider', '-id'], name='provider_payment_idx'),
+        ]
+
+class CustomerPayment(models.Model):
+    customer = models.ForeignKey(CustomerProfile, on_delete=models.CASCADE, related_name='payment_history')
+    amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    details = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.customer_id} payment {self.amount}"
+
+    class Meta:
+        verbose_name = 'Customer Payment'
+        verbose_name_plural = 'Customer Payments'
+        indexes = [
+            models.Index(fields=['customer', '-id'], name='customer_payment_idx'),
+        ]
 
 class Material(models.Model):
     name = models.CharField(max_length=100)
@@ -69,6 +161,12 @@ class Material(models.Model):
     def __str__(self):
         return f"{self.name} ({self.qrCode})"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', 'id'], name='material_name_idx'),
+            models.Index(fields=['price', 'id'], name='material_price_idx'),
+        ]
+
 class AdminProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='admin_profile')
     phone = models.CharField(max_length=20, unique=True)
@@ -83,6 +181,9 @@ class AdminProfile(models.Model):
     class Meta:
         verbose_name = 'Admin Profile'
         verbose_name_plural = 'Admin Profiles'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='adminprofile_created_idx'),
+        ]
 
 class AuditLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='audit_logs')
@@ -90,7 +191,7 @@ class AuditLog(models.Model):
     target_type = models.CharField(max_length=100)  # e.g., 'Material', 'AdminProfile'
     target_id = models.IntegerField(null=True, blank=True)
     details = models.JSONField(default=dict, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)  # Set when logged, not when the sink writes it
 
     def __str__(self):
         return f"{self.user} {self.action} {self.target_type} {self.target_id} at {self.timestamp}"
@@ -99,6 +200,12 @@ class AuditLog(models.Model):
         verbose_name = 'Audit Log'
         verbose_name_plural = 'Audit Logs'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='auditlog_timestamp_idx'),
+            models.Index(fields=['action', '-timestamp'], name='auditlog_action_ts_idx'),
+            models.Index(fields=['action', 'id'], name='auditlog_action_id_idx'),
+            models.Index(fields=['target_type', 'id'], name='auditlog_target_type_id_idx'),
+        ]
 
 class Notification(models.Model):
     recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
@@ -116,32 +223,66 @@ class Notification(models.Model):
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['recipient', 'id'], name='notification_recipient_id_idx'),
+            models.Index(fields=['recipient', 'read', '-timestamp'], name='notification_inbox_idx'),
+            models.Index(fields=['-timestamp', '-id'], name='notification_timestamp_idx'),
+            models.Index(fields=['type', 'id'], name='notification_type_id_idx'),
+            models.Index(fields=['read', 'id'], name='notification_read_id_idx'),
+        ]
 
-@receiver(post_save, sender=Notification)
-def broadcast_notification(sender, instance, created, **kwargs):
+class ArchiveManifest(models.Model):
+    # One compressed JSONL file of rows moved out of a hot table, see accounts.retention
+    model = models.CharField(max_length=50)  # 'AuditLog' or 'Notification'
+    month = models.DateField()  # First day of the archived month
+    part = models.PositiveSmallIntegerField(default=1)
+    path = models.CharField(max_length=500)
+    row_count = models.PositiveIntegerField()
+    min_id = models.BigIntegerField()
+    max_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.model} {self.month:%Y-%m} part {self.part} ({self.row_count} rows)"
+
+    class Meta:
+        verbose_name = 'Archive Manifest'
+        verbose_name_plural = 'Archive Manifests'
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'month', 'part'], name='archive_manifest_unique'),
+        ]
+
+@receiver(pre_save, sender=ProviderProfile)
+def sync_provider_geohash(sender, instance, **kwargs):
+    lat, lng = location_coordinates(instance.location)
+    instance.latitude, instance.longitude = lat, lng
+    instance.geohash = encode_geohash(lat, lng) if lat is not None else ''
+
+def sync_availability_windows(provider):
+    wanted = availability_windows(provider.availability)
+    current = set(provider.availability_windows.values_list('weekday', 'start_minute', 'end_minute'))
+    if wanted == current:
+        return
+    provider.availability_windows.all().delete()
+    ProviderAvailabilityWindow.objects.bulk_create([
+        ProviderAvailabilityWindow(provider=provider, weekday=weekday, start_minute=start, end_minute=end)
+        for weekday, start, end in sorted(wanted)
+    ])
+
+@receiver(post_save, sender=ProviderProfile)
+def sync_provider_availability(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'availability' in update_fields:
+        sync_availability_windows(instance)
+
+@receiver(post_save, sender=ProviderProfile)
+@receiver(post_save, sender=CustomerProfile)
+@receiver(post_delete, sender=ProviderProfile)
+@receiver(post_delete, sender=CustomerProfile)
+def invalidate_profile_roles(sender, instance, created=True, **kwargs):
     if created:
-        channel_layer = get_channel_layer()
-        if hasattr(instance.recipient, 'provider_profile'):
-            group = f'provider_{instance.recipient.id}'
-        elif hasattr(instance.recipient, 'customer_profile'):
-            group = f'user_{instance.recipient.id}'
-        elif instance.recipient.is_staff:
-            group = f'admin_{instance.recipient.id}'
-        else:
-            group = None
-        if group:
-            async_to_sync(channel_layer.group_send)(
-                group,
-                {
-                    'type': 'notify',
-                    'notification': {
-                        'id': instance.id,
-                        'type': instance.type,
-                        'message': instance.message,
-                        'related_type': instance.related_type,
-                        'related_id': instance.related_id,
-                        'read': instance.read,
-                        'timestamp': instance.timestamp.isoformat(),
-                    }
-                }
-            )
+        role_resolver.invalidate(instance.user_id)
+
+@receiver(post_save, sender=User)
+def invalidate_user_roles(sender, instance, created, **kwargs):
+    if not created:
+        role_resolver.invalidate(instance.id)
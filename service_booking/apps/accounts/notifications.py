@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from .background import background_loop
+from .models import Notification
+from .roles import role_resolver, notification_group
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'NOTIFICATION_BATCH_SIZE', 500)
+
+
+def notification_payload(notification):
+    return {
+        'id': notification.id,
+        'type': notification.type,
+        'message': notification.message,
+        'related_type': notification.related_type,
+        'related_id': notification.related_id,
+        'read': notification.read,
+        'timestamp': notification.timestamp.isoformat(),
+    }
+
+
+class NotificationPipeline:
+    """Broadcasts committed notifications from the background loop in batches."""
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self._queue = None
+        self._worker = None
+
+    def publish(self, notifications):
+        items = [(n.recipient_id, notification_payload(n)) for n in notifications]
+        if items:
+            background_loop.call_soon(self._enqueue, items)
+
+    def flush(self, timeout=None):
+        """Block until everything published so far has been broadcast."""
+        background_loop.submit(self._join()).result(timeout)
+
+    def _enqueue(self, items):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        for item in items:
+            self._queue.put_nowait(item)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self.run())
+
+    async def _join(self):
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def run(self):
+        channel_layer = get_channel_layer()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                roles = await role_resolver.aresolve({user_id for user_id, _ in batch})
+                groups = {user_id: notification_group(user_roles) for user_id, user_roles in roles.items()}
+                results = await asyncio.gather(
+                    *[
+                        channel_layer.group_send(groups[user_id], {'type': 'notify', 'notification': payload})
+                        for user_id, payload in batch if groups.get(user_id)
+                    ],
+                    return_exceptions=True,
+                )
+                failed = sum(isinstance(result, Exception) for result in results)
+                if failed:
+                    logger.warning('Failed to broadcast %d of %d notifications', failed, len(results))
+            except Exception:
+                logger.exception('Failed to broadcast %d notifications', len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+pipeline = NotificationPipeline()
+
+
+def notify_many(notifications):
+    """Insert unsaved Notification instances in one query and broadcast them after commit."""
+    created = Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+    transaction.on_commit(lambda: pipeline.publish(created))
+    return created
+
+
+def notify_user(user, notif_type, message, related_type='', related_id=None):
+    return notify_many([
+        Notification(
+            recipient=user,
+            type=notif_type,
+            message=message,
+            related_type=related_type,
+            related_id=related_id,
+        )
+    ])[0]
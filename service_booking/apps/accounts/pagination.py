@@ -0,0 +1,125 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import or_
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+def with_tie_breaker(ordering):
+    """Cut the ordering at the first id column, or append one in the direction of the leading column."""
+    ordering = ['id' if name == 'pk' else '-id' if name == '-pk' else name for name in ordering]
+    for i, name in enumerate(ordering):
+        if name.lstrip('-') == 'id':
+            return tuple(ordering[:i + 1])
+    return tuple(ordering) + ('-id' if ordering[0].startswith('-') else 'id',)
+
+
+def flip(ordering):
+    return tuple(name[1:] if name.startswith('-') else '-' + name for name in ordering)
+
+
+def order_expressions(model, ordering):
+    # Pin NULL placement (last ascending, first descending) so it matches `after` on every backend
+    expressions = []
+    for name in ordering:
+        field = name.lstrip('-')
+        if not model._meta.get_field(field).null:
+            expressions.append(name)
+        elif name.startswith('-'):
+            expressions.append(F(field).desc(nulls_first=True))
+        else:
+            expressions.append(F(field).asc(nulls_last=True))
+    return expressions
+
+
+def after(model, ordering, position):
+    """Rows strictly after `position` in `ordering`: (a > x) | (a = x & b > y) | ... per column direction."""
+    terms, equal = [], Q()
+    for name, value in zip(ordering, position):
+        field = name.lstrip('-')
+        descending = name.startswith('-')
+        nullable = model._meta.get_field(field).null
+        if value is None:
+            if descending:
+                terms.append(equal & Q(**{f'{field}__isnull': False}))
+            equal &= Q(**{f'{field}__isnull': True})
+            continue
+        beyond = Q(**{f'{field}__lt' if descending else f'{field}__gt': value})
+        if nullable and not descending:
+            beyond |= Q(**{f'{field}__isnull': True})
+        terms.append(equal & beyond)
+        equal &= Q(**{field: value})
+    return reduce(or_, terms) if terms else Q(pk__in=[])
+
+
+def encode_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class AdminCursorPagination(CursorPagination):
+    """Keyset pagination for admin lists; follows the view's OrderingFilter so deep pages stay index-backed.
+
+    The cursor carries every ordering column of the boundary row plus `id` as a tie-breaker, so orderings
+    on low-cardinality columns (status, rating, ...) still visit each row exactly once.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.sort_key = with_tie_breaker(self.get_ordering(request, queryset, view))
+        reverse, position = self.decode_cursor(request) or (False, None)
+        ordering = flip(self.sort_key) if reverse else self.sort_key
+        if position is not None:
+            try:
+                queryset = queryset.filter(after(queryset.model, ordering, position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        rows = list(queryset.order_by(*order_expressions(queryset.model, ordering))[:self.page_size + 1])
+        more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+        # Following a cursor means there are rows on the side we came from
+        self.has_next, self.has_previous = (position is not None, more) if reverse else (more, position is not None)
+        return self.page
+
+    def position(self, instance):
+        return [getattr(instance, name.lstrip('-')) for name in self.sort_key]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor((False, self.position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor((True, self.position(self.page[0])))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            reverse, position = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.sort_key):
+            raise NotFound(self.invalid_cursor_message)
+        return bool(reverse), position
+
+    def encode_cursor(self, cursor):
+        reverse, position = cursor
+        encoded = urlsafe_b64encode(json.dumps([int(reverse), position], default=encode_value).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
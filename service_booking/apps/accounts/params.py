@@ -0,0 +1,36 @@
+from rest_framework.exceptions import ValidationError
+from .availability import requested_datetime
+
+
+def datetime_param(params, name):
+    """Optional ISO 8601 date or datetime query parameter; raises a 400 ValidationError when malformed."""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        moment = requested_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({name: 'Enter a valid ISO 8601 date or datetime.'})
+    return moment
+
+
+def int_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'Enter a whole number.'})
+
+
+def timestamp_range(queryset, params, field='timestamp'):
+    """Apply ?since= (inclusive) and ?until= (exclusive) to `field`."""
+    since, until = datetime_param(params, 'since'), datetime_param(params, 'until')
+    if since:
+        queryset = queryset.filter(**{f'{field}__gte': since})
+    if until:
+        queryset = queryset.filter(**{f'{field}__lt': until})
+    return queryset
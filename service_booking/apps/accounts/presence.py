@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import threading
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from .background import background_loop
+from .models import ProviderProfile, CustomerProfile
+
+logger = logging.getLogger(__name__)
+
+# A connection counts as online while it keeps pinging within the TTL
+PRESENCE_TTL = getattr(settings, 'PRESENCE_TTL', 90)  # seconds
+PRESENCE_FLUSH_INTERVAL = getattr(settings, 'PRESENCE_FLUSH_INTERVAL', 30)  # seconds
+
+
+def presence_key(user_id):
+    return f'presence:{user_id}'
+
+
+def last_active_update(model, seen):
+    """One UPDATE setting last_active for every user in `seen` ({user_id: datetime})."""
+    return model.objects.filter(user_id__in=seen).update(
+        last_active=Case(*[When(user_id=user_id, then=Value(moment)) for user_id, moment in seen.items()]),
+    )
+
+
+def flush_last_active(seen, batch_size=500):
+    user_ids = list(seen)
+    for start in range(0, len(user_ids), batch_size):
+        batch = {user_id: seen[user_id] for user_id in user_ids[start:start + batch_size]}
+        last_active_update(ProviderProfile, batch)
+        last_active_update(CustomerProfile, batch)
+
+
+class PresenceTracker:
+    """Tracks which users have live WebSocket connections.
+
+    Connection counts live in this process; the cache holds a TTL'd marker per online user so other
+    processes can see it. last_active is not written per heartbeat but coalesced and flushed in batches.
+    """
+
+    def __init__(self, ttl=PRESENCE_TTL, flush_interval=PRESENCE_FLUSH_INTERVAL):
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.connections = {}  # user_id -> open connections in this process
+        self.seen = {}  # user_id -> last heartbeat not yet written to the database
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    async def connect(self, user_id):
+        self.connections[user_id] = self.connections.get(user_id, 0) + 1
+        await self.ping(user_id)
+
+    async def disconnect(self, user_id):
+        remaining = self.connections.get(user_id, 0) - 1
+        if remaining > 0:
+            self.connections[user_id] = remaining
+            return
+        self.connections.pop(user_id, None)
+        self.touch(user_id)
+        await cache.adelete(presence_key(user_id))
+
+    async def ping(self, user_id):
+        self.touch(user_id)
+        await cache.aset(presence_key(user_id), True, self.ttl)
+
+    def touch(self, user_id):
+        with self._lock:
+            self.seen[user_id] = timezone.now()
+            if self._flusher is None:
+                self._flusher = background_loop.submit(self.run())
+
+    def online(self, user_ids):
+        """The subset of `user_ids` that are online in any process."""
+        user_ids = set(user_ids)
+        local = user_ids.intersection(self.connections)
+        remote = user_ids - local
+        if remote:
+            found = cache.get_many([presence_key(user_id) for user_id in remote])
+            local.update(user_id for user_id in remote if presence_key(user_id) in found)
+        return local
+
+    def flush(self):
+        with self._lock:
+            seen, self.seen = self.seen, {}
+        if seen:
+            flush_last_active(seen)
+        return len(seen)
+
+    async def run(self):
+        flush = database_sync_to_async(self.flush, thread_sensitive=False)
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await flush()
+            except Exception:
+                logger.exception('Failed to flush presence heartbeats')
+
+
+presence = PresenceTracker()
@@ -0,0 +1,86 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def plan_serializer(serializer, prefix=''):
+    """Work out the lookups needed to render `serializer` as (select_related, prefetch_related, only).
+
+    Forward FKs and one-to-ones rendered by a nested serializer are joined; many-valued relations
+    (nested or as primary key lists) are prefetched, with their own nested relations planned recursively.
+    `only` lists the columns the fields read, or is None when a field's source can't be mapped to columns.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    model = serializer.Meta.model
+    select, prefetch, only = [], [], []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*' or len(field.source_attrs) != 1:
+            only = None
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            only = None
+            continue
+        path = prefix + field.source
+        if not model_field.is_relation:
+            if only is not None:
+                only.append(path)
+            continue
+        if model_field.many_to_many or model_field.one_to_many:
+            if isinstance(field, serializers.ListSerializer):
+                child_select, child_prefetch, _ = plan_serializer(field.child)
+                queryset = model_field.related_model._default_manager.select_related(*child_select)
+                prefetch.append(Prefetch(path, queryset=queryset.prefetch_related(*child_prefetch)))
+            else:
+                prefetch.append(path)
+        elif isinstance(field, serializers.BaseSerializer):
+            select.append(path)
+            child_select, child_prefetch, child_only = plan_serializer(field, prefix=path + '__')
+            select.extend(child_select)
+            prefetch.extend(child_prefetch)
+            if only is not None and child_only is not None and model_field.concrete:
+                only.append(path)
+                only.extend(child_only)
+            else:
+                only = None
+        elif model_field.concrete:
+            if only is not None:
+                only.append(path)
+        else:
+            # Reverse one-to-one rendered as a primary key still needs the related row
+            select.append(path)
+            only = None
+    return select, prefetch, only
+
+
+def plan_queryset(queryset, serializer, restrict_columns=False, extra_columns=()):
+    select, prefetch, only = plan_serializer(serializer)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if restrict_columns and only is not None:
+        queryset = queryset.only(*only, *extra_columns)
+    return queryset
+
+
+class QueryPlanMixin:
+    """Applies the serializer's select/prefetch plan to the view's queryset.
+
+    On read requests the selected columns are also narrowed to what the serializer renders,
+    plus the view's ordering fields so cursor pagination doesn't reload deferred columns.
+    """
+
+    def get_queryset(self):
+        ordering = list(getattr(self, 'ordering', None) or []) + list(getattr(self, 'ordering_fields', None) or [])
+        return plan_queryset(
+            super().get_queryset(),
+            self.get_serializer(),
+            restrict_columns=self.request.method in SAFE_METHODS,
+            extra_columns={name.lstrip('-') for name in ordering if '__' not in name},
+        )
@@ -0,0 +1,97 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from .models import AuditLog, Notification, ArchiveManifest
+
+# Rows older than the retention period are moved out of the hot tables a whole month at a time
+RETENTION_DAYS = {
+    'AuditLog': getattr(settings, 'AUDIT_LOG_RETENTION_DAYS', 365),
+    'Notification': getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90),
+}
+ARCHIVED_MODELS = {'AuditLog': AuditLog, 'Notification': Notification}
+ARCHIVE_ROOT = getattr(settings, 'ARCHIVE_ROOT', 'archives')
+
+
+def month_start(moment):
+    local = timezone.localtime(moment)
+    return local.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(start):
+    return timezone.make_aware((start.replace(tzinfo=None) + timedelta(days=32)).replace(day=1))
+
+
+def retention_cutoff(name, now=None):
+    """Start of the oldest month that is still (at least partly) within retention."""
+    return month_start((now or timezone.now()) - timedelta(days=RETENTION_DAYS[name]))
+
+
+def expired_months(name, now=None):
+    """Starts of the months whose rows are all past retention, oldest first."""
+    oldest = ARCHIVED_MODELS[name].objects.aggregate(oldest=Min('timestamp'))['oldest']
+    if oldest is None:
+        return []
+    cutoff = retention_cutoff(name, now)
+    months, month = [], month_start(oldest)
+    while month < cutoff:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def archive_path(root, name, month, part):
+    return os.path.join(root, name.lower(), f'{month:%Y-%m}.part{part}.jsonl.gz')
+
+
+def delete_in_batches(queryset, batch_size):
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            deleted += queryset.model.objects.filter(id__in=ids).delete()[0]
+
+
+def archive_month(name, month, root=ARCHIVE_ROOT, chunk_size=5000):
+    """Move one month of rows into a compressed JSONL part file, then delete them from the hot table.
+
+    Rows are read in keyset chunks, so memory stays flat. The file is written under a temporary name and
+    recorded in ArchiveManifest before anything is deleted; a rerun first finishes deleting the rows of
+    existing parts and archives whatever is left as a new part. Returns (archived, deleted).
+    """
+    model = ARCHIVED_MODELS[name]
+    rows = model.objects.filter(timestamp__gte=month, timestamp__lt=next_month(month))
+    deleted = 0
+    for manifest in ArchiveManifest.objects.filter(model=name, month=month.date()):
+        deleted += delete_in_batches(rows.filter(id__gte=manifest.min_id, id__lte=manifest.max_id), chunk_size)
+    part = ArchiveManifest.objects.filter(model=name, month=month.date()).count() + 1
+    path = archive_path(root, name, month, part)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    count, min_id, max_id, last_id = 0, None, None, 0
+    with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as archive:
+        while True:
+            chunk = list(rows.filter(id__gt=last_id).order_by('id').values()[:chunk_size])
+            if not chunk:
+                break
+            for row in chunk:
+                archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+            last_id = chunk[-1]['id']
+            min_id = chunk[0]['id'] if min_id is None else min_id
+            max_id = last_id
+            count += len(chunk)
+    if not count:
+        os.remove(path + '.tmp')
+        return 0, deleted
+    os.replace(path + '.tmp', path)
+    ArchiveManifest.objects.create(
+        model=name, month=month.date(), part=part, path=path, row_count=count, min_id=min_id, max_id=max_id,
+    )
+    deleted += delete_in_batches(rows.filter(id__gte=min_id, id__lte=max_id), chunk_size)
+    return count, deleted
@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import namedtuple
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+ROLE_CACHE_TTL = getattr(settings, 'ROLE_CACHE_TTL', 300)  # seconds
+
+UserRoles = namedtuple('UserRoles', ['user_id', 'is_provider', 'is_customer', 'is_staff'])
+
+
+class RoleResolver:
+    """Resolves which profiles a user has with one query per batch, cached per process with a TTL."""
+
+    def __init__(self, ttl=ROLE_CACHE_TTL):
+        self.ttl = ttl
+        self._cache = {}  # user_id -> (UserRoles, expires_at)
+        self._lock = threading.Lock()
+
+    def cached(self, user_ids):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                user_id: entry[0]
+                for user_id in user_ids
+                if (entry := self._cache.get(user_id)) and entry[1] > now
+            }
+
+    def resolve(self, user_ids):
+        user_ids = set(user_ids)
+        roles = self.cached(user_ids)
+        missing = user_ids - roles.keys()
+        if missing:
+            fetched = {
+                user_id: UserRoles(user_id, bool(provider_id), bool(customer_id), is_staff)
+                for user_id, is_staff, provider_id, customer_id in get_user_model().objects.filter(
+                    id__in=missing
+                ).values_list('id', 'is_staff', 'provider_profile__id', 'customer_profile__id')
+            }
+            expires_at = time.monotonic() + self.ttl
+            with self._lock:
+                for user_id, user_roles in fetched.items():
+                    self._cache[user_id] = (user_roles, expires_at)
+            roles.update(fetched)
+        return roles
+
+    async def aresolve(self, user_ids):
+        # Cache hits are served without a thread-pool hop
+        user_ids = set(user_ids)
+        roles = self.cached(user_ids)
+        if len(roles) < len(user_ids):
+            roles = await database_sync_to_async(self.resolve, thread_sensitive=False)(user_ids)
+        return roles
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+
+role_resolver = RoleResolver()
+
+
+def connection_groups(roles):
+    """Channel groups a user's sockets join."""
+    groups = []
+    if roles.is_provider:
+        groups.append(f'provider_{roles.user_id}')
+    elif roles.is_customer:
+        groups.append(f'user_{roles.user_id}')
+    if roles.is_staff:
+        groups.append(f'admin_{roles.user_id}')
+    return groups
+
+
+def notification_group(roles):
+    """The single group a user's notifications are broadcast to."""
+    if roles.is_provider:
+        return f'provider_{roles.user_id}'
+    if roles.is_customer:
+        return f'user_{roles.user_id}'
+    if roles.is_staff:
+        return f'admin_{roles.user_id}'
+    return None
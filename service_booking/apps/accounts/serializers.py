@@ -1,63 +1,140 @@
 from rest_framework import serializers
-from .models import User, ProviderProfile, CustomerProfile, Service, Material, AdminProfile, AuditLog, Notification
+from rest_framework.generics import ListAPIView
+from rest_framework.permissions import SAFE_METHODS
+from .models import User, ProviderProfile, CustomerProfile, ProviderActivity, ProviderPayment, CustomerPayment, Service, Material, AdminProfile, AuditLog, Notification, ArchiveManifest
 
-class UserSerializer(serializers.ModelSerializer):
+def query_param_set(request, name):
+    return {value.strip() for value in request.query_params.get(name, '').split(',') if value.strip()}
+
+class SparseFieldsetMixin:
+    """Supports ?fields=a,b and ?expand=nested on read requests.
+
+    List views render Meta.list_fields, with nested serializers in their own compact form
+    unless named in ?expand=. ?fields= picks the top-level fields explicitly.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is not None and request.method in SAFE_METHODS:
+            self.apply_sparse_fieldset(request, self.context.get('view'))
+
+    def apply_sparse_fieldset(self, request, view):
+        compact = getattr(view, 'action', None) == 'list' or (
+            isinstance(view, ListAPIView) and not hasattr(view, 'action')
+        )
+        requested = query_param_set(request, 'fields')
+        if requested:
+            self.keep_fields(requested)
+        elif compact:
+            self.keep_list_fields()
+        if compact or requested:
+            # Expanded relations are left exactly as declared, nested relations included
+            expand = query_param_set(request, 'expand')
+            for name, field in self.fields.items():
+                if isinstance(field, SparseFieldsetMixin) and name not in expand:
+                    field.compact()
+
+    def keep_list_fields(self):
+        list_fields = getattr(self.Meta, 'list_fields', None)
+        if list_fields:
+            self.keep_fields(list_fields)
+
+    def compact(self):
+        self.keep_list_fields()
+        for field in self.fields.values():
+            if isinstance(field, SparseFieldsetMixin):
+                field.compact()
+
+    def keep_fields(self, names):
+        for name in list(self.fields):
+            if name not in names:
+                self.fields.pop(name)
+
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'is_active', 'is_staff', 'date_joined']
+        list_fields = ['id', 'username', 'email']
 
-class ServiceSerializer(serializers.ModelSerializer):
+class ServiceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Service
         fields = ['id', 'name']
 
-class ProviderProfileSerializer(serializers.ModelSerializer):
+class ProviderProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     service = ServiceSerializer(read_only=True)
     class Meta:
         model = ProviderProfile
         fields = [
             'id', 'user', 'phone', 'email', 'service', 'is_available', 'location', 'assigned_bookings',
-            'rating', 'total_jobs_completed', 'salary_details', 'monthly_activity', 'payment_history',
-            'refresh_token', 'is_approved', 'last_active', 'availability'
+            'rating', 'rating_count', 'total_jobs_completed', 'salary_details', 'refresh_token', 'is_approved',
+            'last_active', 'availability'
         ]
-        read_only_fields = ['user', 'last_active', 'rating']
+        read_only_fields = ['user', 'last_active', 'rating', 'rating_count', 'total_jobs_completed']
+        list_fields = ['id', 'user', 'phone', 'service', 'is_available', 'rating', 'is_approved', 'last_active']
 
-class CustomerProfileSerializer(serializers.ModelSerializer):
+class CustomerProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     class Meta:
         model = CustomerProfile
         fields = [
-            'id', 'user', 'phone', 'email', 'address', 'location', 'booking_history',
-            'payment_history', 'refresh_token', 'last_active'
+            'id', 'user', 'phone', 'email', 'address', 'location', 'booking_history', 'refresh_token', 'last_active'
         ]
         read_only_fields = ['user', 'last_active']
+        list_fields = ['id', 'user', 'phone', 'email', 'address', 'last_active']
 
-class MaterialSerializer(serializers.ModelSerializer):
+class ProviderActivitySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ProviderActivity
+        fields = ['id', 'provider', 'month', 'details', 'created_at']
+        read_only_fields = ['created_at']
+
+class ProviderPaymentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ProviderPayment
+        fields = ['id', 'provider', 'amount', 'details', 'created_at']
+        read_only_fields = ['created_at']
+
+class CustomerPaymentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = CustomerPayment
+        fields = ['id', 'customer', 'amount', 'details', 'created_at']
+        read_only_fields = ['created_at']
+
+class MaterialSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Material
         fields = ['id', 'name', 'qrCode', 'price', 'unit']
 
-class AdminProfileSerializer(serializers.ModelSerializer):
+class AdminProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     class Meta:
         model = AdminProfile
         fields = ['id', 'user', 'phone', 'superAdmin', 'refreshToken', 'created_at', 'updated_at']
         read_only_fields = ['user', 'created_at', 'updated_at']
+        list_fields = ['id', 'user', 'phone', 'superAdmin', 'created_at', 'updated_at']
 
-class AuditLogSerializer(serializers.ModelSerializer):
+class AuditLogSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     class Meta:
         model = AuditLog
         fields = ['id', 'user', 'action', 'target_type', 'target_id', 'details', 'timestamp']
         read_only_fields = ['user', 'timestamp']
+        list_fields = ['id', 'user', 'action', 'target_type', 'target_id', 'timestamp']
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     recipient = UserSerializer(read_only=True)
     class Meta:
         model = Notification
         fields = ['id', 'recipient', 'type', 'message', 'related_type', 'related_id', 'read', 'timestamp']
         read_only_fields = ['recipient', 'timestamp']
+        list_fields = ['id', 'recipient', 'type', 'message', 'read', 'timestamp']
+
+class ArchiveManifestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchiveManifest
+        fields = ['id', 'model', 'month', 'part', 'path', 'row_count', 'min_id', 'max_id', 'created_at']
 
 MaterialSerializer = MaterialSerializer
 AdminProfileSerializer = AdminProfileSerializer
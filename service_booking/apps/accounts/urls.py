@@ -1,14 +1,18 @@
 from rest_framework.routers import DefaultRouter
-from .views import UserViewSet, ProviderProfileViewSet, CustomerProfileViewSet, ServiceViewSet, MaterialViewSet, AdminProfileViewSet, AuditLogViewSet, NotificationViewSet
+from .views import UserViewSet, ProviderProfileViewSet, CustomerProfileViewSet, ProviderActivityViewSet, ProviderPaymentViewSet, CustomerPaymentViewSet, ServiceViewSet, MaterialViewSet, AdminProfileViewSet, AuditLogViewSet, NotificationViewSet, ArchiveManifestViewSet
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')
 router.register(r'providers', ProviderProfileViewSet, basename='providerprofile')
 router.register(r'customers', CustomerProfileViewSet, basename='customerprofile')
+router.register(r'provider-activity', ProviderActivityViewSet, basename='provideractivity')
+router.register(r'provider-payments', ProviderPaymentViewSet, basename='providerpayment')
+router.register(r'customer-payments', CustomerPaymentViewSet, basename='customerpayment')
 router.register(r'services', ServiceViewSet, basename='service')
 router.register(r'materials', MaterialViewSet, basename='material')
 router.register(r'admins', AdminProfileViewSet, basename='adminprofile')
 router.register(r'auditlogs', AuditLogViewSet, basename='auditlog')
 router.register(r'notifications', NotificationViewSet, basename='notification')
+router.register(r'archives', ArchiveManifestViewSet, basename='archivemanifest')
 
 urlpatterns = router.urls
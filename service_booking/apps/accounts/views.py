@@ -1,60 +1,85 @@
-from rest_framework import viewsets, permissions, filters
-from .models import User, ProviderProfile, CustomerProfile, Service, Material, AdminProfile, AuditLog, Notification
-from .serializers import UserSerializer, ProviderProfileSerializer, CustomerProfileSerializer, ServiceSerializer, MaterialSerializer, AdminProfileSerializer, AuditLogSerializer, NotificationSerializer
+from rest_framework import viewsets, permissions, filters, mixins
+from django_filters.rest_framework import DjangoFilterBackend
+from .models import User, ProviderProfile, CustomerProfile, ProviderActivity, ProviderPayment, CustomerPayment, Service, Material, AdminProfile, AuditLog, Notification, ArchiveManifest
+from .audit import audit_entry, audit_sink
+from .pagination import AdminCursorPagination
+from .params import timestamp_range
+from .query_planning import QueryPlanMixin
+from .serializers import UserSerializer, ProviderProfileSerializer, CustomerProfileSerializer, ProviderActivitySerializer, ProviderPaymentSerializer, CustomerPaymentSerializer, ServiceSerializer, MaterialSerializer, AdminProfileSerializer, AuditLogSerializer, NotificationSerializer, ArchiveManifestSerializer
 
 def log_admin_action(user, action, target_type, target_id=None, details=None):
-    AuditLog.objects.create(
-        user=user,
-        action=action,
-        target_type=target_type,
-        target_id=target_id,
-        details=details or {},
-    )
+    audit_sink.log([audit_entry(user, action, target_type, target_id, details)])
 
 class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_staff
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['username', 'email']
     ordering_fields = ['date_joined', 'username']
     ordering = ['-date_joined']
 
-class ProviderProfileViewSet(viewsets.ModelViewSet):
+class ProviderProfileViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = ProviderProfile.objects.all()
     serializer_class = ProviderProfileSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['user__username', 'phone', 'service__name']
     ordering_fields = ['rating', 'last_active']
     ordering = ['-rating', '-last_active']
 
-class CustomerProfileViewSet(viewsets.ModelViewSet):
+class CustomerProfileViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = CustomerProfile.objects.all()
     serializer_class = CustomerProfileSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['user__username', 'phone', 'email', 'address']
     ordering_fields = ['last_active']
     ordering = ['-last_active']
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class HistoryViewSet(QueryPlanMixin, mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    # Append-only: entries can be added and paged through, not edited
+    permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
+    filter_backends = [DjangoFilterBackend]
+
+class ProviderActivityViewSet(HistoryViewSet):
+    queryset = ProviderActivity.objects.all()
+    serializer_class = ProviderActivitySerializer
+    filterset_fields = ['provider', 'month']
+
+class ProviderPaymentViewSet(HistoryViewSet):
+    queryset = ProviderPayment.objects.all()
+    serializer_class = ProviderPaymentSerializer
+    filterset_fields = ['provider']
+
+class CustomerPaymentViewSet(HistoryViewSet):
+    queryset = CustomerPayment.objects.all()
+    serializer_class = CustomerPaymentSerializer
+    filterset_fields = ['customer']
+
+class ServiceViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['name']
     ordering = ['name']
 
-class MaterialViewSet(viewsets.ModelViewSet):
+class MaterialViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Material.objects.all()
     serializer_class = MaterialSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'qrCode']
     ordering_fields = ['name', 'price']
@@ -90,10 +115,11 @@ class MaterialViewSet(viewsets.ModelViewSet):
         )
         instance.delete()
 
-class AdminProfileViewSet(viewsets.ModelViewSet):
+class AdminProfileViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = AdminProfile.objects.all()
     serializer_class = AdminProfileSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['user__username', 'phone']
     ordering_fields = ['created_at', 'updated_at']
@@ -141,20 +167,37 @@ class AdminProfileViewSet(viewsets.ModelViewSet):
             )
         return response
 
-class AuditLogViewSet(viewsets.ModelViewSet):
+class TimestampRangeMixin:
+    # ?since=&until= stays on the timestamp index; rows past retention live in the archives listed below
+    def get_queryset(self):
+        return timestamp_range(super().get_queryset(), self.request.query_params)
+
+class AuditLogViewSet(TimestampRangeMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset = AuditLog.objects.all()
     serializer_class = AuditLogSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['user__username', 'action', 'target_type', 'target_id']
     ordering_fields = ['timestamp', 'action', 'target_type']
     ordering = ['-timestamp']
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(TimestampRangeMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['recipient__username', 'type', 'message', 'related_type', 'related_id']
     ordering_fields = ['timestamp', 'type', 'read']
     ordering = ['-timestamp']
+
+class ArchiveManifestViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ArchiveManifest.objects.all()
+    serializer_class = ArchiveManifestSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = {'model': ['exact'], 'month': ['exact', 'gte', 'lte']}
+    ordering_fields = ['month', 'created_at']
+    ordering = ['-month']
@@ -1,9 +1,15 @@
 from django.contrib import admin
-from .models import Booking
+from .models import Booking, BookingEvent
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ('id', 'service', 'customer', 'provider', 'status', 'scheduled_time', 'created_at')
     search_fields = ('service__name', 'customer__user__username', 'provider__user__username')
     list_filter = ('status', 'service')
-    ordering = ('-created_at',) 
\ No newline at end of file
+    ordering = ('-created_at',)
+
+@admin.register(BookingEvent)
+class BookingEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'booking', 'event', 'actor', 'service', 'city', 'wave', 'elapsed_ms', 'timestamp')
+    list_filter = ('event', 'service')
+    ordering = ('-timestamp',)
@@ -0,0 +1,87 @@
+import math
+from collections import Counter, defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import BookingDailyRollup, BookingAcceptRollup
+
+# Upper bounds (seconds) of the time-to-accept histogram buckets
+ACCEPT_BUCKETS = (5, 10, 20, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 21600, 86400, math.inf)
+
+
+def accept_bucket(seconds):
+    for index, upper in enumerate(ACCEPT_BUCKETS):
+        if seconds <= upper:
+            return index
+    return len(ACCEPT_BUCKETS) - 1
+
+
+def bump(model, lookup, **increments):
+    """Add `increments` to the rollup row identified by `lookup`, creating it if needed."""
+    changes = {field: F(field) + value for field, value in increments.items()}
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **increments)
+    except IntegrityError:
+        # Created concurrently
+        model.objects.filter(**lookup).update(**changes)
+
+
+def record_transitions(rows, new_status, accepted_at=None):
+    """Move bookings between status counters.
+
+    rows is [(service_id, created_at, old_status)]; old_status None means the booking is new and
+    new_status None means it was deleted. When `accepted_at` is given the time-to-accept is recorded too.
+    """
+    deltas = Counter()
+    accepts = defaultdict(lambda: [0, 0.0])
+    for service_id, created_at, old_status in rows:
+        if old_status == new_status:
+            continue
+        day = timezone.localdate(created_at)
+        if old_status is not None:
+            deltas[(day, service_id, old_status)] -= 1
+        if new_status is not None:
+            deltas[(day, service_id, new_status)] += 1
+        if accepted_at is not None:
+            seconds = max(0.0, (accepted_at - created_at).total_seconds())
+            entry = accepts[(day, service_id, accept_bucket(seconds))]
+            entry[0] += 1
+            entry[1] += seconds
+    for (day, service_id, status), delta in deltas.items():
+        if delta:
+            bump(BookingDailyRollup, {'day': day, 'service_id': service_id, 'status': status}, count=delta)
+    for (day, service_id, bucket), (count, seconds) in accepts.items():
+        bump(BookingAcceptRollup, {'day': day, 'service_id': service_id, 'bucket': bucket}, count=count, total_seconds=seconds)
+
+
+def booking_summary(day_from=None, day_to=None, service=None):
+    """Dashboard numbers read from the rollup tables."""
+    counters = BookingDailyRollup.objects.all()
+    accepts = BookingAcceptRollup.objects.all()
+    if day_from:
+        counters, accepts = counters.filter(day__gte=day_from), accepts.filter(day__gte=day_from)
+    if day_to:
+        counters, accepts = counters.filter(day__lte=day_to), accepts.filter(day__lte=day_to)
+    if service:
+        counters, accepts = counters.filter(service_id=service), accepts.filter(service_id=service)
+    by_status = dict(counters.values_list('status').annotate(total=Sum('count')))
+    histogram = sorted(accepts.values_list('bucket').annotate(total=Sum('count'), seconds=Sum('total_seconds')))
+    accepted = sum(count for _, count, _ in histogram)
+    avg_response_time = sum(seconds for _, _, seconds in histogram) / accepted if accepted else 0
+    p95_response_time = None
+    running = 0
+    for bucket, count, _ in histogram:
+        running += count
+        if running >= 0.95 * accepted:
+            p95_response_time = ACCEPT_BUCKETS[bucket]
+            break
+    return {
+        'total_bookings': sum(by_status.values()),
+        'completed_bookings': by_status.get('completed', 0),
+        'bookings_by_status': by_status,
+        'avg_response_time': round(avg_response_time, 2),
+        'p95_response_time': None if p95_response_time == math.inf else p95_response_time,
+    }
@@ -1,7 +1,11 @@
+import asyncio
 import json
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
-from .models import Booking
+from .services import claim_booking
+from .dispatch import wave_dispatcher
+from .events import booking_event
+from service_booking.apps.accounts.presence import presence
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
@@ -11,6 +15,7 @@ class BookingConsumer(AsyncJsonWebsocketConsumer):
         if user.is_authenticated:
             await self.channel_layer.group_add(f'provider_{user.id}', self.channel_name)
             await self.accept()
+            await presence.connect(user.id)
         else:
             await self.close()
 
@@ -18,49 +23,56 @@ class BookingConsumer(AsyncJsonWebsocketConsumer):
         user = self.scope['user']
         if user.is_authenticated:
             await self.channel_layer.group_discard(f'provider_{user.id}', self.channel_name)
+            await presence.disconnect(user.id)
 
     async def receive_json(self, content):
         event = content.get('type')
-        if event == 'booking_accept':
+        if event == 'ping':
+            await presence.ping(self.scope['user'].id)
+            await self.send_json({'type': 'pong'})
+        elif event == 'booking_accept':
             booking_id = content.get('booking_id')
             await self.handle_booking_accept(booking_id)
 
     @database_sync_to_async
-    def get_booking(self, booking_id):
-        return Booking.objects.get(id=booking_id)
-
-    @database_sync_to_async
-    def set_booking_confirmed(self, booking, provider):
-        if booking.status == 'pending':
-            booking.status = 'confirmed'
-            booking.assigned_provider = provider
-            booking.save()
-            return True
-        return False
+    def claim_booking(self, booking_id, user):
+        claimed = claim_booking(booking_id, user.id)
+        if claimed is not None:
+            notified = claimed['notified_providers']
+            booking_event(
+                booking_id, claimed['service_id'], claimed['location'], claimed['created_at'], 'confirmed',
+                actor_id=user.id,
+                wave=notified.index(user.id) // wave_dispatcher.wave_size + 1 if user.id in notified else None,
+                at=claimed['confirmed_at'],
+            ).save()
+        return claimed
 
     async def handle_booking_accept(self, booking_id):
-        booking = await self.get_booking(booking_id)
         user = self.scope['user']
-        confirmed = await self.set_booking_confirmed(booking, user)
-        if confirmed:
-            # Notify winner
-            await self.channel_layer.group_send(
+        claimed = await self.claim_booking(booking_id, user)
+        if claimed is None:
+            return
+        wave_dispatcher.confirm(booking_id)
+        # Notify winner and close the request for everyone else concurrently
+        await asyncio.gather(
+            self.channel_layer.group_send(
                 f'provider_{user.id}',
                 {
                     'type': 'booking.confirmed',
                     'booking_id': booking_id
                 }
-            )
-            # Notify others
-            for pid in booking.notified_providers:
-                if pid != user.id:
-                    await self.channel_layer.group_send(
-                        f'provider_{pid}',
-                        {
-                            'type': 'booking.closed',
-                            'booking_id': booking_id
-                        }
-                    )
+            ),
+            *[
+                self.channel_layer.group_send(
+                    f'provider_{pid}',
+                    {
+                        'type': 'booking.closed',
+                        'booking_id': booking_id
+                    }
+                )
+                for pid in claimed['notified_providers'] if pid != user.id
+            ]
+        )
 
     async def booking_request(self, event):
         await self.send_json({
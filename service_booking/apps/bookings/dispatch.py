@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import math
+import time
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from service_booking.apps.accounts.background import background_loop
+from service_booking.apps.accounts.metrics import LatencyRecorder
+from .models import Booking
+from .events import booking_event, record_events
+
+logger = logging.getLogger(__name__)
+
+WAVE_SIZE = getattr(settings, 'BOOKING_WAVE_SIZE', 5)
+MAX_WAVES = getattr(settings, 'BOOKING_MAX_WAVES', 3)
+WAVE_TIMEOUT = getattr(settings, 'BOOKING_WAVE_TIMEOUT', 30)  # seconds
+
+
+class BookingDispatcher:
+    """Sends provider notifications from a background loop so requests don't wait on the channel layer."""
+
+    def __init__(self):
+        self.delivery_latency = LatencyRecorder()
+
+    async def deliver(self, messages, enqueued_at):
+        # messages: [(group, event), ...]; enqueued_at is a time.monotonic() reading from the caller's thread
+        channel_layer = get_channel_layer()
+        results = await asyncio.gather(
+            *[channel_layer.group_send(group, event) for group, event in messages],
+            return_exceptions=True,
+        )
+        for (group, _), result in zip(messages, results):
+            if isinstance(result, Exception):
+                logger.warning('Failed to notify %s: %s', group, result)
+        self.delivery_latency.record(time.monotonic() - enqueued_at)
+
+
+dispatcher = BookingDispatcher()
+
+
+class TimerWheel:
+    """Hashed timer wheel: one asyncio task ticks every `resolution` seconds for all scheduled keys.
+
+    Must only be used from the loop it runs on. Expired keys are handed to `on_expire` in one batch per tick.
+    """
+
+    def __init__(self, on_expire, resolution=1.0, slots=512):
+        self.on_expire = on_expire
+        self.resolution = resolution
+        self.slots = slots
+        self._buckets = [{} for _ in range(slots)]  # key -> remaining rounds
+        self._slot_of = {}
+        self._cursor = 0
+        self._task = None
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def schedule(self, key, delay):
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.resolution))
+        slot = (self._cursor + ticks) % self.slots
+        self._buckets[slot][key] = (ticks - 1) // self.slots
+        self._slot_of[key] = slot
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def cancel(self, key):
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            del self._buckets[slot][key]
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while self._slot_of:
+            next_tick += self.resolution
+            await asyncio.sleep(max(0, next_tick - loop.time()))
+            self._cursor = (self._cursor + 1) % self.slots
+            bucket = self._buckets[self._cursor]
+            expired = []
+            for key, rounds in list(bucket.items()):
+                if rounds:
+                    bucket[key] = rounds - 1
+                else:
+                    del bucket[key]
+                    del self._slot_of[key]
+                    expired.append(key)
+            if expired:
+                try:
+                    await self.on_expire(expired)
+                except Exception:
+                    logger.exception('Timer wheel callback failed for %d keys', len(expired))
+
+
+def pending_booking_ids(booking_ids):
+    return set(Booking.objects.filter(id__in=booking_ids, status='pending').values_list('id', flat=True))
+
+
+def record_notified_providers(notified_by_booking, wave_size=WAVE_SIZE):
+    """Extend notified_providers on bookings that are still pending; returns the ids that were updated."""
+    with transaction.atomic():
+        updated = {
+            booking_id for booking_id, notified in notified_by_booking.items()
+            if Booking.objects.filter(id=booking_id, status='pending').update(notified_providers=notified)
+        }
+        at = timezone.now()
+        record_events([
+            booking_event(booking_id, service_id, location, created_at, 'dispatched',
+                          wave=math.ceil(len(notified_by_booking[booking_id]) / wave_size), at=at)
+            for booking_id, service_id, location, created_at in Booking.objects.filter(
+                id__in=updated,
+            ).values_list('id', 'service_id', 'location', 'created_at')
+        ])
+    return updated
+
+
+class WaveDispatcher:
+    """Notifies ranked providers in waves until one of them accepts or the ranking runs out.
+
+    Each booking's next wave is sent when its timeout expires on the shared timer wheel, provided the booking
+    is still pending in the database, so confirmations made in other processes also stop escalation.
+    """
+
+    def __init__(self, wave_size=WAVE_SIZE, timeout=WAVE_TIMEOUT):
+        self.wave_size = wave_size
+        self.timeout = timeout
+        self.active = {}  # booking_id -> {'remaining': [...], 'notified': [...], 'event': {...}}
+        self.wheel = TimerWheel(self.expire)
+
+    def start(self, booking_id, ranked_user_ids, event):
+        """Send the first wave; thread-safe, call once the booking is committed."""
+        background_loop.call_soon(self._start, booking_id, list(ranked_user_ids), event, time.monotonic())
+
+    def confirm(self, booking_id):
+        """Stop escalating a booking; time to accept is kept in the accept rollups."""
+        background_loop.call_soon(self._stop, booking_id)
+
+    def _start(self, booking_id, ranked_user_ids, event, enqueued_at):
+        wave, remaining = ranked_user_ids[:self.wave_size], ranked_user_ids[self.wave_size:]
+        self.send_wave(booking_id, wave, event, enqueued_at)
+        if remaining:
+            self.active[booking_id] = {'remaining': remaining, 'notified': wave, 'event': event}
+            self.wheel.schedule(booking_id, self.timeout)
+
+    def _stop(self, booking_id):
+        self.active.pop(booking_id, None)
+        self.wheel.cancel(booking_id)
+
+    def send_wave(self, booking_id, user_ids, event, enqueued_at):
+        messages = [(f'provider_{uid}', dict(event, booking_id=booking_id)) for uid in user_ids]
+        asyncio.get_running_loop().create_task(dispatcher.deliver(messages, enqueued_at))
+
+    async def expire(self, booking_ids):
+        expired_at = time.monotonic()
+        pending = await database_sync_to_async(pending_booking_ids, thread_sensitive=False)(booking_ids)
+        waves, notified = {}, {}
+        for booking_id in booking_ids:
+            state = self.active.get(booking_id)
+            if state is None:
+                continue
+            if booking_id not in pending:
+                # Accepted or cancelled elsewhere
+                del self.active[booking_id]
+                continue
+            wave = state['remaining'][:self.wave_size]
+            state['remaining'] = state['remaining'][self.wave_size:]
+            state['notified'] = state['notified'] + wave
+            waves[booking_id] = wave
+            notified[booking_id] = state['notified']
+        if not waves:
+            return
+        updated = await database_sync_to_async(record_notified_providers, thread_sensitive=False)(notified, self.wave_size)
+        for booking_id, wave in waves.items():
+            state = self.active.get(booking_id)
+            if state is None:
+                continue
+            if booking_id not in updated:
+                # Confirmed between the pending check and the update; these providers were never asked
+                del self.active[booking_id]
+                continue
+            self.send_wave(booking_id, wave, state['event'], expired_at)
+            if state['remaining']:
+                self.wheel.schedule(booking_id, self.timeout)
+            else:
+                del self.active[booking_id]
+
+
+wave_dispatcher = WaveDispatcher()
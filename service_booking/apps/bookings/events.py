@@ -0,0 +1,73 @@
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+from .models import BookingEvent
+
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (1000, 5000, 15000, 30000, 60000, 120000, 300000, 600000, 1800000, 3600000, 86400000)
+HISTOGRAM_GROUPS = ('service', 'city')
+
+
+def booking_event(booking_id, service_id, location, created_at, event, actor_id=None, wave=None, at=None):
+    """Unsaved BookingEvent; elapsed_ms is measured from the booking's creation and clamped at zero."""
+    at = at or timezone.now()
+    return BookingEvent(
+        booking_id=booking_id,
+        event=event,
+        actor_id=actor_id,
+        service_id=service_id,
+        city=str((location or {}).get('city') or '')[:100],
+        wave=wave,
+        timestamp=at,
+        elapsed_ms=max(0, int((at - created_at).total_seconds() * 1000)),
+    )
+
+
+def record_events(events):
+    if events:
+        BookingEvent.objects.bulk_create(events)
+
+
+def latency_histogram(event='confirmed', service=None, city=None, start=None, end=None, group_by=None, buckets=LATENCY_BUCKETS_MS):
+    """Cumulative histogram of time from creation to `event`, optionally grouped by service or city.
+
+    Each group is one aggregate over the (event, service|city, timestamp) indexes.
+    """
+    queryset = BookingEvent.objects.filter(event=event)
+    if service:
+        queryset = queryset.filter(service_id=service)
+    if city:
+        queryset = queryset.filter(city=city)
+    if start:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end:
+        queryset = queryset.filter(timestamp__lt=end)
+    aggregates = {f'le_{bound}': Count('id', filter=Q(elapsed_ms__lte=bound)) for bound in buckets}
+    aggregates.update(count=Count('id'), avg_ms=Avg('elapsed_ms'))
+    if group_by:
+        rows = queryset.values(group_by).annotate(**aggregates).order_by(group_by)
+    else:
+        rows = [queryset.aggregate(**aggregates)]
+    histograms = []
+    for row in rows:
+        count = row['count']
+        cumulative = [{'le_ms': bound, 'count': row[f'le_{bound}']} for bound in buckets]
+        histograms.append({
+            **({group_by: row[group_by]} if group_by else {}),
+            'count': count,
+            'avg_ms': round(row['avg_ms'] or 0, 2),
+            'p50_ms': percentile_bound(cumulative, count, 0.5),
+            'p95_ms': percentile_bound(cumulative, count, 0.95),
+            'p99_ms': percentile_bound(cumulative, count, 0.99),
+            'buckets': cumulative,
+        })
+    return histograms
+
+
+def percentile_bound(cumulative, count, fraction):
+    """Upper bound of the bucket holding the given percentile, or None if it's past the last bucket."""
+    if not count:
+        return None
+    for bucket in cumulative:
+        if bucket['count'] >= fraction * count:
+            return bucket['le_ms']
+    return None
@@ -0,0 +1,57 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from service_booking.apps.bookings.ranking import rank_candidates
+from service_booking.apps.bookings.services import haversine, TOP_PROVIDERS
+
+class Command(BaseCommand):
+    help = 'Compare the scalar provider ranking loop with the vectorized NumPy path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def loop_rank(self, lat, lon, rows, k):
+        providers = []
+        for pk, p_lat, p_lon, rating, last_active in rows:
+            providers.append({
+                'id': pk,
+                'distance': haversine(lat, lon, p_lat, p_lon),
+                'rating': rating,
+                'last_active': last_active,
+            })
+        providers.sort(key=lambda x: (x['distance'], -x['rating'], -x['last_active']))
+        return [(x['id'], x['distance']) for x in providers[:k]]
+
+    def best_of(self, func, repeat):
+        best = float('inf')
+        result = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        lat, lon = 12.9716, 77.5946
+        self.stdout.write(f'{"candidates":>10} {"loop ms":>10} {"numpy ms":>10} {"speedup":>8}')
+        for size in options['sizes']:
+            rows = [
+                (
+                    pk,
+                    lat + rng.uniform(-0.5, 0.5),
+                    lon + rng.uniform(-0.5, 0.5),
+                    rng.choice([3.0, 3.5, 4.0, 4.5, 5.0]),
+                    1.7e9 + rng.randint(0, 86400),
+                )
+                for pk in range(size)
+            ]
+            loop_time, expected = self.best_of(lambda: self.loop_rank(lat, lon, rows, TOP_PROVIDERS), options['repeat'])
+            numpy_time, actual = self.best_of(lambda: rank_candidates(lat, lon, rows, TOP_PROVIDERS), options['repeat'])
+            if [pk for pk, _ in expected] != [pk for pk, _ in actual]:
+                self.stderr.write(self.style.ERROR(f'Ranking mismatch at {size} candidates.'))
+            self.stdout.write(
+                f'{size:>10} {loop_time * 1000:>10.2f} {numpy_time * 1000:>10.2f} {loop_time / numpy_time:>7.1f}x'
+            )
@@ -0,0 +1,55 @@
+import asyncio
+import statistics
+import time
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from service_booking.apps.accounts.models import ProviderProfile, CustomerProfile
+from service_booking.apps.bookings.models import Booking
+from service_booking.apps.bookings.services import claim_booking
+
+class Command(BaseCommand):
+    help = 'Fire N simultaneous accepts at pending bookings and check that exactly one provider wins each.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--providers', type=int, default=5)
+        parser.add_argument('--rounds', type=int, default=50)
+
+    async def race(self, booking_id, provider_user_ids):
+        claim = sync_to_async(claim_booking, thread_sensitive=False)
+        start = time.perf_counter()
+        results = await asyncio.gather(*[claim(booking_id, uid) for uid in provider_user_ids])
+        return time.perf_counter() - start, sum(result is not None for result in results)
+
+    def handle(self, *args, **options):
+        providers = list(
+            ProviderProfile.objects.filter(is_approved=True).values_list('user_id', 'service_id')[:options['providers']]
+        )
+        customer = CustomerProfile.objects.first()
+        if len(providers) < 2 or customer is None:
+            raise CommandError('Need at least two approved providers and one customer.')
+        user_ids = [uid for uid, _ in providers]
+        timings, failures = [], 0
+        for _ in range(options['rounds']):
+            booking = Booking.objects.create(
+                service_id=providers[0][1],
+                customer=customer,
+                status='pending',
+                notified_providers=user_ids,
+            )
+            try:
+                elapsed, winners = asyncio.run(self.race(booking.id, user_ids))
+            finally:
+                booking.delete()
+            timings.append(elapsed * 1000)
+            if winners != 1:
+                failures += 1
+                self.stderr.write(self.style.ERROR(f'Booking #{booking.id} had {winners} winners.'))
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        self.stdout.write(
+            f'{options["rounds"]} rounds x {len(user_ids)} accepts: '
+            f'median {statistics.median(timings):.2f} ms, p95 {p95:.2f} ms, max {timings[-1]:.2f} ms'
+        )
+        if failures:
+            raise CommandError(f'{failures} rounds did not have exactly one winner.')
+        self.stdout.write(self.style.SUCCESS('Exactly one winner in every round.'))
@@ -0,0 +1,43 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from service_booking.apps.bookings.analytics import accept_bucket
+from service_booking.apps.bookings.models import Booking, BookingDailyRollup, BookingAcceptRollup
+
+class Command(BaseCommand):
+    help = 'Recompute the booking analytics rollups from the bookings table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        counters = [
+            BookingDailyRollup(day=row['day'], service_id=row['service_id'], status=row['status'], count=row['count'])
+            for row in Booking.objects.annotate(day=TruncDate('created_at'))
+            .values('day', 'service_id', 'status').annotate(count=Count('id')).order_by()
+        ]
+        accepts = defaultdict(lambda: [0, 0.0])
+        last_id = 0
+        confirmed = Booking.objects.filter(confirmed_at__isnull=False).order_by('id')
+        while True:
+            rows = list(confirmed.filter(id__gt=last_id).values_list('id', 'service_id', 'created_at', 'confirmed_at')[:options['chunk_size']])
+            if not rows:
+                break
+            for _, service_id, created_at, confirmed_at in rows:
+                seconds = max(0.0, (confirmed_at - created_at).total_seconds())
+                entry = accepts[(timezone.localdate(created_at), service_id, accept_bucket(seconds))]
+                entry[0] += 1
+                entry[1] += seconds
+            last_id = rows[-1][0]
+        with transaction.atomic():
+            BookingDailyRollup.objects.all().delete()
+            BookingAcceptRollup.objects.all().delete()
+            BookingDailyRollup.objects.bulk_create(counters, batch_size=options['chunk_size'])
+            BookingAcceptRollup.objects.bulk_create([
+                BookingAcceptRollup(day=day, service_id=service_id, bucket=bucket, count=count, total_seconds=seconds)
+                for (day, service_id, bucket), (count, seconds) in accepts.items()
+            ], batch_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(counters)} status rollups and {len(accepts)} accept buckets.'))
@@ -0,0 +1,71 @@
+import math
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.core.management.base import BaseCommand
+from service_booking.apps.accounts.models import ProviderProfile
+from service_booking.apps.bookings.models import Booking
+from service_booking.apps.bookings.ratings import decay_weight
+
+AGGREGATE_FIELDS = ['rating', 'rating_sum', 'rating_count', 'decayed_rating_sum', 'decayed_rating_weight', 'total_jobs_completed']
+
+class Command(BaseCommand):
+    help = 'Recompute provider rating aggregates and completed job counts from bookings, a chunk of providers at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def backfill_weights(self, chunk_size):
+        # Bookings rated before rated_at existed are weighted from their creation time
+        unweighted = Booking.objects.filter(rating__isnull=False, rating_weight__isnull=True).order_by('id')
+        filled = 0
+        while True:
+            bookings = list(unweighted.only('id', 'created_at')[:chunk_size])
+            if not bookings:
+                return filled
+            for booking in bookings:
+                booking.rated_at = booking.created_at
+                booking.rating_weight = decay_weight(booking.created_at)
+            Booking.objects.bulk_update(bookings, ['rated_at', 'rating_weight'])
+            filled += len(bookings)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        filled = self.backfill_weights(chunk_size)
+        changed, last_id = 0, 0
+        while True:
+            provider_ids = list(ProviderProfile.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not provider_ids:
+                break
+            last_id = provider_ids[-1]
+            rated = Q(rating__isnull=False)
+            totals = {
+                row['provider_id']: row
+                for row in Booking.objects.filter(provider_id__in=provider_ids).values('provider_id').annotate(
+                    rating_count=Count('rating'),
+                    rating_sum=Sum('rating', default=0.0),
+                    decayed_rating_sum=Sum(F('rating') * F('rating_weight'), default=0.0),
+                    decayed_rating_weight=Sum('rating_weight', filter=rated, default=0.0),
+                    total_jobs_completed=Count('id', filter=Q(status='completed')),
+                ).order_by()
+            }
+            with transaction.atomic():
+                providers = list(ProviderProfile.objects.select_for_update().filter(id__in=provider_ids).only('id', *AGGREGATE_FIELDS))
+                stale = []
+                for provider in providers:
+                    row = totals.get(provider.id, {})
+                    expected = {
+                        'rating_sum': row.get('rating_sum', 0.0),
+                        'rating_count': row.get('rating_count', 0),
+                        'decayed_rating_sum': row.get('decayed_rating_sum', 0.0),
+                        'decayed_rating_weight': row.get('decayed_rating_weight', 0.0),
+                        'total_jobs_completed': row.get('total_jobs_completed', 0),
+                    }
+                    weight = expected['decayed_rating_weight']
+                    expected['rating'] = expected['decayed_rating_sum'] / weight if weight > 0 else provider.rating
+                    if not all(math.isclose(getattr(provider, field), value, rel_tol=1e-9) for field, value in expected.items()):
+                        for field, value in expected.items():
+                            setattr(provider, field, value)
+                        stale.append(provider)
+                ProviderProfile.objects.bulk_update(stale, AGGREGATE_FIELDS)
+            changed += len(stale)
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {filled} rating weights; corrected {changed} providers.'))
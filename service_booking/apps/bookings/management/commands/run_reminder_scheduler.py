@@ -0,0 +1,44 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from service_booking.apps.accounts.notifications import pipeline
+from service_booking.apps.bookings.reminders import ReminderScheduler
+
+class Command(BaseCommand):
+    help = 'Resident reminder scheduler: sleeps until the next reminder is due instead of polling from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lead-minutes', type=int, default=60, help='How long before the booking to remind.')
+        parser.add_argument('--horizon-hours', type=int, default=24, help='How far ahead bookings are kept in memory.')
+        parser.add_argument('--refresh-seconds', type=float, default=30, help='How often to pick up new or changed bookings.')
+        parser.add_argument('--report-seconds', type=float, default=60, help='How often to log lag metrics.')
+
+    def handle(self, *args, **options):
+        scheduler = ReminderScheduler(
+            lead=timedelta(minutes=options['lead_minutes']),
+            horizon=timedelta(hours=options['horizon_hours']),
+        )
+        refresh_every, report_every = options['refresh_seconds'], options['report_seconds']
+        next_refresh = next_report = time.monotonic()
+        try:
+            while True:
+                if time.monotonic() >= next_refresh:
+                    close_old_connections()
+                    scheduler.refresh(timezone.now())
+                    next_refresh = time.monotonic() + refresh_every
+                scheduler.run_due(timezone.now())
+                if time.monotonic() >= next_report:
+                    self.stdout.write(f'Reminder scheduler: {scheduler.metrics()}')
+                    next_report = time.monotonic() + report_every
+                wake = min(next_refresh, next_report)
+                due = scheduler.next_due()
+                if due is not None:
+                    wake = min(wake, time.monotonic() + (due - timezone.now()).total_seconds())
+                time.sleep(max(0.0, wake - time.monotonic()))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pipeline.flush(timeout=60)
+            self.stdout.write(self.style.SUCCESS(f'Reminder scheduler stopped after sending {scheduler.sent} reminders.'))
@@ -1,40 +1,26 @@
+from datetime import timedelta
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from service_booking.apps.bookings.models import Booking
-from service_booking.apps.accounts.models import Notification
-from service_booking.apps.bookings.views import notify_user
+from service_booking.apps.accounts.notifications import pipeline
+from service_booking.apps.bookings.services import send_due_reminders, REMINDER_BATCH_SIZE
 
 class Command(BaseCommand):
     help = 'Send reminders for bookings scheduled in the next hour.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--window-minutes', type=int, default=60)
+        parser.add_argument('--min-id', type=int, help='Lowest booking id handled by this worker.')
+        parser.add_argument('--max-id', type=int, help='Highest booking id handled by this worker.')
+        parser.add_argument('--batch-size', type=int, default=REMINDER_BATCH_SIZE)
+
     def handle(self, *args, **options):
-        now = timezone.now()
-        one_hour_later = now + timezone.timedelta(hours=1)
-        bookings = Booking.objects.filter(
-            scheduled_time__gte=now,
-            scheduled_time__lte=one_hour_later,
-            status='confirmed'
+        count = send_due_reminders(
+            timezone.now(),
+            timedelta(minutes=options['window_minutes']),
+            min_id=options['min_id'],
+            max_id=options['max_id'],
+            batch_size=options['batch_size'],
         )
-        count = 0
-        for booking in bookings:
-            customer_user = booking.customer.user if hasattr(booking.customer, 'user') else None
-            if not customer_user:
-                continue
-            # Avoid duplicate reminders
-            already_notified = Notification.objects.filter(
-                recipient=customer_user,
-                type='booking_reminder',
-                related_type='Booking',
-                related_id=booking.id,
-                message__icontains='reminder'
-            ).exists()
-            if not already_notified:
-                notify_user(
-                    customer_user,
-                    'booking_reminder',
-                    f'Reminder: Your booking #{booking.id} is scheduled at {booking.scheduled_time.strftime("%Y-%m-%d %H:%M")}.',
-                    'Booking',
-                    booking.id
-                )
-                count += 1
-        self.stdout.write(self.style.SUCCESS(f'Sent {count} booking reminders.')) 
\ No newline at end of file
+        # Broadcasts run on a background thread; wait for them before the process exits
+        pipeline.flush(timeout=60)
+        self.stdout.write(self.style.SUCCESS(f'Sent {count} booking reminders.'))
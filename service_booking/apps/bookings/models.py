@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from service_booking.apps.accounts.models import Service, ProviderProfile, CustomerProfile
 
 class Booking(models.Model):
@@ -17,9 +19,14 @@ class Booking(models.Model):
     location = models.JSONField(default=dict, blank=True)  # {'city': str, 'coordinates': {'lat': float, 'lng': float}}
     payment_details = models.JSONField(default=dict, blank=True)  # {'amount': 0, ...}
     rating = models.FloatField(null=True, blank=True)
+    rated_at = models.DateTimeField(null=True, blank=True)
+    rating_weight = models.FloatField(null=True, blank=True)  # Forward-decay weight at rated_at
     feedback = models.TextField(blank=True)
     notified_providers = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+    reminded_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # queryset.update() callers must set it
 
     def __str__(self):
         return f"Booking #{self.id} for {self.service.name} by {self.customer.user.username}"
@@ -27,3 +34,94 @@ class Booking(models.Model):
     class Meta:
         verbose_name = 'Booking'
         verbose_name_plural = 'Bookings'
+        indexes = [
+            models.Index(fields=['provider', 'status', 'scheduled_time'], name='booking_provider_slot_idx'),
+            models.Index(fields=['status', '-created_at'], name='booking_status_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='booking_created_idx'),
+            models.Index(fields=['status', 'id'], name='booking_status_id_idx'),
+            models.Index(fields=['scheduled_time', 'id'], name='booking_scheduled_id_idx'),
+            models.Index(
+                fields=['scheduled_time', 'id'],
+                name='booking_reminder_due_idx',
+                condition=models.Q(status='confirmed', reminded_at__isnull=True),
+            ),
+        ]
+
+class BookingDailyRollup(models.Model):
+    # Number of bookings created on `day` for `service` that are currently in `status`
+    day = models.DateField()
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='booking_rollups')
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day} {self.service_id} {self.status}: {self.count}"
+
+    class Meta:
+        verbose_name = 'Booking Daily Rollup'
+        verbose_name_plural = 'Booking Daily Rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'service', 'status'], name='booking_rollup_unique'),
+        ]
+
+class BookingAcceptRollup(models.Model):
+    # Histogram of time-to-accept for bookings created on `day`; bucket indexes analytics.ACCEPT_BUCKETS
+    day = models.DateField()
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='accept_rollups')
+    bucket = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+    total_seconds = models.FloatField(default=0.0)
+
+    def __str__(self):
+        return f"{self.day} {self.service_id} bucket {self.bucket}: {self.count}"
+
+    class Meta:
+        verbose_name = 'Booking Accept Rollup'
+        verbose_name_plural = 'Booking Accept Rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'service', 'bucket'], name='accept_rollup_unique'),
+        ]
+
+class BookingEvent(models.Model):
+    # Append-only lifecycle log; service and city are copied from the booking so histograms don't need joins
+    EVENT_CHOICES = [
+        ('created', 'Created'),
+        ('dispatched', 'Dispatched'),
+    ] + Booking.STATUS_CHOICES
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='events')
+    event = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='booking_events')
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='booking_events')
+    city = models.CharField(max_length=100, blank=True)
+    wave = models.PositiveSmallIntegerField(null=True, blank=True)
+    timestamp = models.DateTimeField()
+    elapsed_ms = models.BigIntegerField()  # Since the booking was created, never negative
+
+    def __str__(self):
+        return f"Booking #{self.booking_id} {self.event} after {self.elapsed_ms} ms"
+
+    class Meta:
+        verbose_name = 'Booking Event'
+        verbose_name_plural = 'Booking Events'
+        indexes = [
+            models.Index(fields=['booking', 'timestamp'], name='booking_event_booking_idx'),
+            models.Index(fields=['event', 'service', 'timestamp'], name='booking_event_service_idx'),
+            models.Index(fields=['event', 'city', 'timestamp'], name='booking_event_city_idx'),
+        ]
+
+@receiver(post_save, sender=Booking)
+def rollup_created_booking(sender, instance, created, **kwargs):
+    if created:
+        from .analytics import record_transitions
+        record_transitions([(instance.service_id, instance.created_at, None)], instance.status)
+
+@receiver(post_delete, sender=Booking)
+def rollup_deleted_booking(sender, instance, **kwargs):
+    from .analytics import record_transitions
+    record_transitions([(instance.service_id, instance.created_at, instance.status)], None)
+
+@receiver(post_save, sender=Booking)
+def log_created_booking(sender, instance, created, **kwargs):
+    if created:
+        from .events import booking_event
+        booking_event(instance.id, instance.service_id, instance.location, instance.created_at, 'created', wave=1 if instance.notified_providers else None).save()
@@ -0,0 +1,53 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine_many(lat, lon, lats, lngs):
+    phi1, phi2 = np.radians(lat), np.radians(lats)
+    dphi = np.radians(lats - lat)
+    dlambda = np.radians(lngs - lon)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def top_k(distances, ratings, last_active, k):
+    """Indices of the k best candidates ordered by (distance, -rating, -last_active)."""
+    n = len(distances)
+    if n == 0 or k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        # Keep everything tied with the k-th distance so tie-breaks match a full sort
+        kth = distances[np.argpartition(distances, k - 1)[k - 1]]
+        selected = np.flatnonzero(distances <= kth)
+    else:
+        selected = np.arange(n)
+    order = np.lexsort((-last_active[selected], -ratings[selected], distances[selected]))
+    return selected[order[:k]]
+
+
+def rank_candidates(lat, lon, rows, k, max_distance=None, online=None):
+    """Rank (id, lat, lng, rating, last_active_ts) rows, returning [(id, distance)].
+
+    If a set of `online` ids is given, online candidates are ranked ahead of the rest.
+    """
+    if not rows:
+        return []
+    # One contiguous float64 block; ids stay exact up to 2**53
+    ids, lats, lngs, ratings, last_active = np.array(rows, dtype=np.float64).T
+    distances = haversine_many(lat, lon, lats, lngs)
+    if max_distance is not None:
+        within = distances <= max_distance
+        ids, distances = ids[within], distances[within]
+        ratings, last_active = ratings[within], last_active[within]
+    if online:
+        groups = np.isin(ids, np.fromiter(online, dtype=np.float64, count=len(online)))
+        groups = [np.flatnonzero(groups), np.flatnonzero(~groups)]
+    else:
+        groups = [np.arange(len(ids))]
+    best = []
+    for group in groups:
+        chosen = top_k(distances[group], ratings[group], last_active[group], k - len(best))
+        best.extend(group[chosen])
+    return [(int(ids[i]), float(distances[i])) for i in best]
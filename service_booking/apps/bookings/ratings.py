@@ -0,0 +1,116 @@
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from service_booking.apps.accounts.models import ProviderProfile
+from .models import Booking
+
+# Forward decay: a rating made at t is weighted 2 ** ((t - landmark) / half-life), so newer ratings count
+# more without ever having to re-weight older ones as time passes.
+RATING_HALF_LIFE_DAYS = getattr(settings, 'PROVIDER_RATING_HALF_LIFE_DAYS', 90)
+DECAY_LANDMARK = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def decay_weight(moment):
+    return 2 ** ((moment - DECAY_LANDMARK).total_seconds() / (RATING_HALF_LIFE_DAYS * 86400))
+
+
+def apply_rating_change(provider_id, old=None, new=None):
+    """Swap a booking's (rating, weight) contribution `old` for `new` in the provider's running aggregates.
+
+    Either may be None. The decayed average in `rating` is recomputed from the same UPDATE; providers left
+    with no rated bookings keep their current rating.
+    """
+    rating_sum = decayed_sum = weight = 0.0
+    count = 0
+    for sign, contribution in ((-1, old), (1, new)):
+        if contribution is not None:
+            rating, rating_weight = contribution
+            rating_sum += sign * rating
+            decayed_sum += sign * rating * rating_weight
+            weight += sign * rating_weight
+            count += sign
+    adjust_rating_aggregates(provider_id, rating_sum, count, decayed_sum, weight)
+
+
+def adjust_rating_aggregates(provider_id, rating_sum, count, decayed_sum, weight):
+    if not count and not weight and not rating_sum:
+        return
+    ProviderProfile.objects.filter(id=provider_id).update(
+        rating_sum=F('rating_sum') + rating_sum,
+        rating_count=F('rating_count') + count,
+        decayed_rating_sum=F('decayed_rating_sum') + decayed_sum,
+        decayed_rating_weight=F('decayed_rating_weight') + weight,
+        rating=Case(
+            When(decayed_rating_weight__gt=-weight, then=(F('decayed_rating_sum') + decayed_sum) / (F('decayed_rating_weight') + weight)),
+            default=F('rating'),
+        ),
+    )
+
+
+def rate_booking(booking_id, rating, at=None):
+    """Set (or clear, with None) a booking's rating and fold the change into its provider's aggregates."""
+    at = at or timezone.now()
+    with transaction.atomic():
+        booking = Booking.objects.select_for_update().values('provider_id', 'rating', 'rating_weight').filter(id=booking_id).first()
+        if booking is None:
+            return
+        weight = decay_weight(at) if rating is not None else None
+        Booking.objects.filter(id=booking_id).update(
+            rating=rating, rated_at=at if rating is not None else None, rating_weight=weight, updated_at=at,
+        )
+        if booking['provider_id']:
+            apply_rating_change(
+                booking['provider_id'],
+                old=booking_contribution(booking['rating'], booking['rating_weight']),
+                new=booking_contribution(rating, weight),
+            )
+
+
+def booking_contribution(rating, weight):
+    if rating is None or weight is None:
+        return None
+    return rating, weight
+
+
+def move_ratings(rows):
+    """Move rated bookings' contributions between providers; rows is [(old_provider_id, new_provider_id, rating, weight)]."""
+    deltas = {}
+    for old_provider_id, new_provider_id, rating, weight in rows:
+        if old_provider_id == new_provider_id or booking_contribution(rating, weight) is None:
+            continue
+        for sign, provider_id in ((-1, old_provider_id), (1, new_provider_id)):
+            if provider_id is not None:
+                delta = deltas.setdefault(provider_id, [0.0, 0, 0.0, 0.0])
+                delta[0] += sign * rating
+                delta[1] += sign
+                delta[2] += sign * rating * weight
+                delta[3] += sign * weight
+    for provider_id, delta in deltas.items():
+        adjust_rating_aggregates(provider_id, *delta)
+
+
+def record_completions(rows, new_status):
+    """Adjust total_jobs_completed for bookings moving to `new_status`; rows is [(provider_id, old_status)]."""
+    move_completions([(provider_id, old_status, provider_id, new_status) for provider_id, old_status in rows])
+
+
+def move_completions(rows):
+    """Adjust total_jobs_completed; rows is [(old_provider_id, old_status, new_provider_id, new_status)]."""
+    deltas = Counter()
+    for old_provider_id, old_status, new_provider_id, new_status in rows:
+        if old_provider_id is not None and old_status == 'completed':
+            deltas[old_provider_id] -= 1
+        if new_provider_id is not None and new_status == 'completed':
+            deltas[new_provider_id] += 1
+    by_delta = {}
+    for provider_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(provider_id)
+    for delta, provider_ids in by_delta.items():
+        ProviderProfile.objects.filter(id__in=provider_ids).update(
+            total_jobs_completed=Greatest(F('total_jobs_completed') + delta, Value(0)),
+        )
@@ -0,0 +1,89 @@
+import heapq
+import logging
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+from service_booking.apps.accounts.metrics import LatencyRecorder
+from .models import Booking
+from .services import remind_bookings
+
+logger = logging.getLogger(__name__)
+
+# Re-read changes this far behind the watermark so rows committed late with an earlier updated_at aren't missed
+WATERMARK_OVERLAP = timedelta(minutes=1)
+
+
+class ReminderScheduler:
+    """Keeps upcoming reminders in a min-heap keyed by reminder time.
+
+    Only bookings scheduled within `horizon` are held in memory. Each refresh reads bookings changed since
+    the last one (via updated_at) plus those that moved into the horizon, so rescheduled or cancelled
+    bookings replace their heap entries, which are then skipped lazily when popped.
+    """
+
+    def __init__(self, lead=timedelta(hours=1), horizon=timedelta(hours=24)):
+        self.lead = lead
+        self.horizon = horizon
+        self.heap = []  # (remind_at, booking_id)
+        self.scheduled = {}  # booking_id -> remind_at of its live heap entry
+        self.watermark = None
+        self.loaded_until = None
+        self.lag = LatencyRecorder()
+        self.sent = 0
+
+    def refresh(self, now):
+        candidates = Booking.objects.all()
+        horizon_end = now + self.horizon
+        if self.watermark is None:
+            candidates = candidates.filter(status='confirmed', reminded_at__isnull=True, scheduled_time__gt=now)
+            candidates = candidates.filter(scheduled_time__lte=horizon_end)
+        else:
+            candidates = candidates.filter(
+                Q(updated_at__gte=self.watermark - WATERMARK_OVERLAP)
+                | Q(status='confirmed', reminded_at__isnull=True,
+                    scheduled_time__gt=self.loaded_until, scheduled_time__lte=horizon_end)
+            )
+        rows = candidates.values_list('id', 'status', 'reminded_at', 'scheduled_time', 'updated_at')
+        watermark = self.watermark
+        for booking_id, status, reminded_at, scheduled_time, updated_at in rows.iterator():
+            watermark = max(watermark, updated_at) if watermark else updated_at
+            if status == 'confirmed' and reminded_at is None and scheduled_time and now < scheduled_time <= horizon_end:
+                # Bookings made inside the lead time are due now; lag is measured from when they were seen
+                self.schedule(booking_id, max(scheduled_time - self.lead, now))
+            else:
+                self.scheduled.pop(booking_id, None)
+        self.watermark = watermark or now
+        self.loaded_until = horizon_end
+
+    def schedule(self, booking_id, remind_at):
+        if self.scheduled.get(booking_id) != remind_at:
+            self.scheduled[booking_id] = remind_at
+            heapq.heappush(self.heap, (remind_at, booking_id))
+
+    def next_due(self):
+        while self.heap and self.scheduled.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)  # Stale entry
+        return self.heap[0][0] if self.heap else None
+
+    def run_due(self, now):
+        due = {}
+        while self.next_due() is not None and self.heap[0][0] <= now:
+            remind_at, booking_id = heapq.heappop(self.heap)
+            del self.scheduled[booking_id]
+            due[booking_id] = remind_at
+        if not due:
+            return 0
+        reminded = remind_bookings(Booking.objects.filter(id__in=due, scheduled_time__gt=now), now)
+        sent_at = timezone.now()
+        for booking_id in reminded:
+            self.lag.record((sent_at - due[booking_id]).total_seconds())
+        self.sent += len(reminded)
+        return len(reminded)
+
+    def metrics(self):
+        return {
+            'pending': len(self.scheduled),
+            'sent': self.sent,
+            'watermark': self.watermark.isoformat() if self.watermark else None,
+            'lag_ms': self.lag.summary(),
+        }
@@ -1,8 +1,9 @@
 from rest_framework import serializers
-from .models import Booking
-from service_booking.apps.accounts.serializers import ServiceSerializer, ProviderProfileSerializer, CustomerProfileSerializer
+from .models import Booking, BookingEvent
+from service_booking.apps.accounts.models import ProviderProfile
+from service_booking.apps.accounts.serializers import ServiceSerializer, ProviderProfileSerializer, CustomerProfileSerializer, SparseFieldsetMixin
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     service = ServiceSerializer(read_only=True)
     customer = CustomerProfileSerializer(read_only=True)
     provider = ProviderProfileSerializer(read_only=True)
@@ -10,6 +11,26 @@ class BookingSerializer(serializers.ModelSerializer):
         model = Booking
         fields = [
             'id', 'service', 'customer', 'provider', 'status', 'scheduled_time', 'location',
-            'payment_details', 'rating', 'feedback', 'notified_providers', 'created_at'
+            'payment_details', 'rating', 'feedback', 'notified_providers', 'created_at', 'confirmed_at'
         ]
-        read_only_fields = ['created_at'] 
\ No newline at end of file
+        read_only_fields = ['created_at', 'confirmed_at']
+        list_fields = ['id', 'service', 'customer', 'provider', 'status', 'scheduled_time', 'created_at'] 
+
+class BookingBulkFieldsSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Booking.STATUS_CHOICES, required=False)
+    scheduled_time = serializers.DateTimeField(required=False, allow_null=True)
+    provider = serializers.PrimaryKeyRelatedField(queryset=ProviderProfile.objects.all(), required=False, allow_null=True)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('At least one of status, scheduled_time or provider is required.')
+        return attrs
+
+class BookingBulkUpdateSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=100000)
+    update = BookingBulkFieldsSerializer()
+
+class BookingEventSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = BookingEvent
+        fields = ['id', 'booking', 'event', 'actor', 'service', 'city', 'wave', 'timestamp', 'elapsed_ms']
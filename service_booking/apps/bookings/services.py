@@ -1,6 +1,26 @@
 import math
-from service_booking.apps.accounts.models import ProviderProfile
-from django.db.models import Q
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.sql import UpdateQuery
+from service_booking.apps.accounts.models import ProviderProfile, ProviderAvailabilityWindow, CustomerProfile, Notification
+from service_booking.apps.accounts.notifications import notify_many
+from service_booking.apps.accounts.geo import covered_radius_km, location_coordinates, neighbour_cells, prefix_bounds
+from service_booking.apps.accounts.availability import requested_datetime, weekday_minute
+from service_booking.apps.accounts.presence import presence
+from django.db.models import Case, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Booking
+from .analytics import record_transitions
+from .events import booking_event, record_events
+from .ratings import move_completions, move_ratings
+from .ranking import rank_candidates
+
+TOP_PROVIDERS = 5
+MIN_PROVIDER_RATING = getattr(settings, 'MIN_PROVIDER_RATING', 3.0)
+# Geohash precisions searched from the finest (~1km cells) outwards (~150km cells)
+SEARCH_PRECISIONS = (6, 5, 4, 3)
 
 def haversine(lat1, lon1, lat2, lon2):
     R = 6371  # Earth radius in km
@@ -11,30 +31,261 @@ def haversine(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
     return R * c
 
-def get_top_providers(category, user_location, required_skills=None, time=None):
-    lat, lon = user_location['latitude'], user_location['longitude']
+def provider_cells_filter(lat, lon, precision):
+    q = Q()
+    for cell in neighbour_cells(lat, lon, precision):
+        low, high = prefix_bounds(cell)
+        q |= Q(geohash__gte=low, geohash__lt=high)
+    return q
+
+def free_at(qs, moment):
+    """Restrict providers to those whose weekly availability covers `moment` and who have no clashing booking."""
+    weekday, minute = weekday_minute(moment)
+    slot = timedelta(minutes=getattr(settings, 'BOOKING_SLOT_MINUTES', 60))
+    available = ProviderAvailabilityWindow.objects.filter(
+        provider=OuterRef('pk'),
+        weekday=weekday,
+        start_minute__lte=minute,
+        end_minute__gt=minute,
+    )
+    clashing = Booking.objects.filter(
+        provider=OuterRef('pk'),
+        status='confirmed',
+        scheduled_time__gt=moment - slot,
+        scheduled_time__lt=moment + slot,
+    )
+    return qs.filter(Exists(available)).exclude(Exists(clashing))
+
+def get_top_providers(category, user_location, required_skills=None, time=None, limit=TOP_PROVIDERS, min_rating=MIN_PROVIDER_RATING):
+    lat, lon = location_coordinates(user_location)
     qs = ProviderProfile.objects.filter(
-        category=category,
+        service__name=category,
         is_available=True,
         is_approved=True,
-        rating__gte=3.0  # Example threshold
+        rating__gte=min_rating,  # Decayed average kept fresh by bookings.ratings
     )
     if required_skills:
         for skill in required_skills:
             qs = qs.filter(skills__icontains=skill)
     # Filter by availability at requested time if provided
-    # (Assume availability is a dict: {'Monday': [{'from': '10:00', 'to': '18:00'}]})
-    # ... (add time filtering logic here if needed) ...
-    providers = []
-    for p in qs:
-        p_lat, p_lon = p.location.get('latitude'), p.location.get('longitude')
-        distance = haversine(lat, lon, p_lat, p_lon)
-        providers.append({
-            'provider': p,
-            'distance': distance,
-            'rating': p.rating,
-            'last_active': p.last_active
-        })
-    # Sort by distance, then rating, then last_active
-    providers.sort(key=lambda x: (x['distance'], -x['rating'], -x['last_active'].timestamp()))
-    return [dict(provider=x['provider'], distance=x['distance']) for x in providers[:5]]
+    moment = requested_datetime(time)
+    if moment is not None:
+        qs = free_at(qs, moment)
+    max_radius = getattr(settings, 'PROVIDER_SEARCH_RADIUS_KM', 50)
+    ranked = []
+    # Expand the search ring until it guarantees `limit` providers or hits the radius cap.
+    # Only providers inside the covered radius are kept, so nothing nearer can be missed.
+    for precision in SEARCH_PRECISIONS:
+        radius = min(covered_radius_km(lat, precision), max_radius)
+        candidates = qs.filter(provider_cells_filter(lat, lon, precision)).values_list(
+            'id', 'user_id', 'latitude', 'longitude', 'rating', 'last_active',
+        )
+        rows, user_ids = [], {}
+        for pk, user_id, p_lat, p_lon, rating, last_active in candidates:
+            rows.append((pk, p_lat, p_lon, rating, last_active.timestamp()))
+            user_ids[user_id] = pk
+        # Online providers first, then by distance, rating and last_active
+        online = {user_ids[user_id] for user_id in presence.online(user_ids)}
+        ranked = rank_candidates(lat, lon, rows, limit, max_distance=radius, online=online)
+        if len(ranked) >= limit or radius >= max_radius:
+            break
+    profiles = ProviderProfile.objects.select_related('user').in_bulk([pk for pk, _ in ranked])
+    return [dict(provider=profiles[pk], distance=distance) for pk, distance in ranked if pk in profiles]
+
+def claim_booking(booking_id, provider_user_id):
+    """Confirm a pending booking for the accepting provider in a single conditional UPDATE.
+
+    Returns the booking's notified_providers, service_id, location, created_at and confirmed_at if this
+    call won the race, otherwise None. The winner reads them back with RETURNING where supported.
+    """
+    provider = ProviderProfile.objects.filter(user_id=provider_user_id)
+    now = timezone.now()
+    pending = Booking.objects.filter(id=booking_id, status='pending').filter(Exists(provider))
+    fields = dict(status='confirmed', provider=Subquery(provider.values('id')[:1]), confirmed_at=now, updated_at=now)
+    returning = ['notified_providers', 'service_id', 'location', 'created_at', 'confirmed_at']
+    if supports_update_returning(pending.db):
+        won = update_returning(pending, fields, returning)
+        if not won:
+            return None
+        claimed = dict(zip(returning, won[0]))
+    else:
+        if not pending.update(**fields):
+            return None
+        claimed = Booking.objects.values(*returning).get(id=booking_id)
+    record_transitions(
+        [(claimed['service_id'], claimed['created_at'], 'pending')], 'confirmed', accepted_at=claimed['confirmed_at'],
+    )
+    return claimed
+
+BULK_UPDATE_CHUNK_SIZE = 1000
+
+STATUS_NOTIFICATIONS = {
+    'confirmed': ('booking_confirmed', 'Your booking #{id} is confirmed.'),
+    'cancelled': ('booking_cancelled', 'Your booking #{id} was cancelled.'),
+    'completed': ('booking_completed', 'Your booking #{id} is completed.'),
+    'rescheduled': ('booking_rescheduled', 'Your booking #{id} was rescheduled.'),
+}
+
+def booking_update_notifications(bookings, fields):
+    """Customer notifications for bookings updated with `fields`; bookings is [(booking_id, customer_user_id)]."""
+    status = fields.get('status')
+    prompted = set()
+    if status == 'completed':
+        # Prompt for review if not already notified
+        prompted = set(Notification.objects.filter(
+            type='review_prompt',
+            related_type='Booking',
+            related_id__in=[booking_id for booking_id, _ in bookings],
+        ).values_list('related_id', flat=True))
+    notifications = []
+    for booking_id, user_id in bookings:
+        messages = []
+        if status in STATUS_NOTIFICATIONS:
+            notif_type, message = STATUS_NOTIFICATIONS[status]
+            messages.append((notif_type, message.format(id=booking_id)))
+        if status == 'completed' and booking_id not in prompted:
+            messages.append(('review_prompt', f'Please leave a review for your completed booking #{booking_id}.'))
+        if 'provider' in fields:
+            messages.append(('provider_assigned', f'A provider was assigned to your booking #{booking_id}.'))
+        notifications.extend(
+            Notification(recipient_id=user_id, type=notif_type, message=message, related_type='Booking', related_id=booking_id)
+            for notif_type, message in messages
+        )
+    return notifications
+
+def update_returning(queryset, fields, returning):
+    """Run queryset.update(**fields) and return the `returning` fields of the updated rows in the same statement.
+
+    Values go through the same converters as a regular query, so JSON and datetimes come back as Python objects.
+    """
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(fields)
+    sql, params = query.get_compiler(queryset.db).as_sql()
+    connection = connections[queryset.db]
+    cols = [queryset.model._meta.get_field(name).get_col(queryset.model._meta.db_table) for name in returning]
+    converters = [connection.ops.get_db_converters(col) + col.get_db_converters(connection) for col in cols]
+    columns = ', '.join(connection.ops.quote_name(col.target.column) for col in cols)
+    with connection.cursor() as cursor:
+        cursor.execute(f'{sql} RETURNING {columns}', params)
+        rows = cursor.fetchall()
+    return [
+        tuple(convert_value(value, col, col_converters, connection) for value, col, col_converters in zip(row, cols, converters))
+        for row in rows
+    ]
+
+def convert_value(value, col, converters, connection):
+    for converter in converters:
+        value = converter(value, col, connection)
+    return value
+
+def supports_update_returning(using):
+    return connections[using].vendor in ('postgresql', 'sqlite') and connections[using].features.can_return_columns_from_insert
+
+def bulk_update_bookings(ids, fields, chunk_size=BULK_UPDATE_CHUNK_SIZE, actor_id=None):
+    """Apply validated `fields` to the given bookings in chunks and notify their customers.
+
+    Status and provider changes read the previous row first so the analytics rollups can be moved along,
+    the transitions logged as booking events by `actor_id`, and completed jobs and ratings moved from
+    the old provider to the new one.
+    Returns the ids of the bookings that were updated.
+    """
+    ids = sorted(set(ids))
+    status = fields.get('status')
+    now = timezone.now()
+    fields = {**fields, 'updated_at': now}
+    if status == 'confirmed':
+        fields['confirmed_at'] = Coalesce('confirmed_at', Value(now))
+    if 'scheduled_time' in fields:
+        # A rescheduled booking is reminded again for its new time
+        fields['reminded_at'] = Case(
+            When(scheduled_time=fields['scheduled_time'], then=F('reminded_at')), default=Value(None),
+        )
+    updated = []  # [(booking_id, customer_id)]
+    with transaction.atomic():
+        for start in range(0, len(ids), chunk_size):
+            chunk = Booking.objects.filter(id__in=ids[start:start + chunk_size])
+            if status is None and 'provider' not in fields and supports_update_returning(chunk.db):
+                updated.extend(update_returning(chunk, fields, ['id', 'customer_id']))
+                continue
+            rows = list(chunk.select_for_update().values_list(
+                'id', 'customer_id', 'service_id', 'created_at', 'status', 'confirmed_at', 'location', 'provider_id',
+                'rating', 'rating_weight',
+            ))
+            Booking.objects.filter(id__in=[row[0] for row in rows]).update(**fields)
+            updated.extend((booking_id, customer_id) for booking_id, customer_id, *_ in rows)
+            if status is not None:
+                first_confirmed = status == 'confirmed'
+                record_transitions(
+                    [(service_id, created_at, old) for _, _, service_id, created_at, old, confirmed_at, *_ in rows
+                     if not (first_confirmed and confirmed_at is None)],
+                    status,
+                )
+                if first_confirmed:
+                    record_transitions(
+                        [(service_id, created_at, old) for _, _, service_id, created_at, old, confirmed_at, *_ in rows
+                         if confirmed_at is None],
+                        status, accepted_at=now,
+                    )
+                at = timezone.now()
+                record_events([
+                    booking_event(booking_id, service_id, location, created_at, status, actor_id=actor_id, at=at)
+                    for booking_id, _, service_id, created_at, old, _, location, *_ in rows if old != status
+                ])
+            if status is not None or 'provider' in fields:
+                new_provider_id = getattr(fields['provider'], 'pk', None) if 'provider' in fields else None
+                moves = [
+                    (old_provider_id, new_provider_id if 'provider' in fields else old_provider_id, old, status or old, rating, weight)
+                    for *_, old, _, _, old_provider_id, rating, weight in rows
+                ]
+                move_completions([(old_provider_id, old, provider_id, new) for old_provider_id, provider_id, old, new, _, _ in moves])
+                move_ratings([(old_provider_id, provider_id, rating, weight) for old_provider_id, provider_id, _, _, rating, weight in moves])
+        customer_users = dict(CustomerProfile.objects.filter(
+            id__in={customer_id for _, customer_id in updated}
+        ).values_list('id', 'user_id'))
+        notify_many(booking_update_notifications(
+            [(booking_id, customer_users[customer_id]) for booking_id, customer_id in updated if customer_id in customer_users],
+            fields,
+        ))
+    return [booking_id for booking_id, _ in updated]
+
+REMINDER_BATCH_SIZE = 500
+
+def remind_bookings(due, now, batch_size=REMINDER_BATCH_SIZE):
+    """Remind customers of the bookings in `due` that haven't been reminded; returns the reminded ids.
+
+    Bookings are claimed a batch at a time by setting reminded_at under SKIP LOCKED, so concurrent
+    workers never remind twice.
+    """
+    due = due.filter(status='confirmed', reminded_at__isnull=True).order_by('id')
+    reminded, last_id = [], 0
+    while True:
+        with transaction.atomic():
+            rows = list(due.filter(id__gt=last_id).select_for_update(skip_locked=True, of=('self',)).values_list(
+                'id', 'customer__user_id', 'scheduled_time',
+            )[:batch_size])
+            if not rows:
+                return reminded
+            last_id = rows[-1][0]
+            ids = [booking_id for booking_id, _, _ in rows]
+            Booking.objects.filter(id__in=ids).update(reminded_at=now)
+            notify_many([
+                Notification(
+                    recipient_id=user_id,
+                    type='booking_reminder',
+                    message=f'Reminder: Your booking #{booking_id} is scheduled at '
+                            f'{timezone.localtime(scheduled_time).strftime("%Y-%m-%d %H:%M")}.',
+                    related_type='Booking',
+                    related_id=booking_id,
+                )
+                for booking_id, user_id, scheduled_time in rows
+            ])
+        reminded.extend(ids)
+
+def send_due_reminders(now, window, min_id=None, max_id=None, batch_size=REMINDER_BATCH_SIZE):
+    """Remind customers of bookings scheduled within `window` of `now`; returns the number of reminders sent."""
+    due = Booking.objects.filter(scheduled_time__gte=now, scheduled_time__lte=now + window)
+    if min_id is not None:
+        due = due.filter(id__gte=min_id)
+    if max_id is not None:
+        due = due.filter(id__lte=max_id)
+    return len(remind_bookings(due, now, batch_size))
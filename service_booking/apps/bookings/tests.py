@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from service_booking.apps.accounts.models import ProviderProfile, CustomerProfile, Service
+from .models import Booking
+from .services import claim_booking
+from .views import BookingViewSet
+
+User = get_user_model()
+
+
+class BookingListQueryCountTests(TestCase):
+    """One page of bookings costs the same number of queries whatever the page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', is_staff=True)
+        service = Service.objects.create(name='Plumbing')
+        providers = [
+            ProviderProfile.objects.create(user=User.objects.create(username=f'provider{i}'), phone=f'p{i}', service=service)
+            for i in range(5)
+        ]
+        customers = [
+            CustomerProfile.objects.create(user=User.objects.create(username=f'customer{i}'), phone=f'c{i}')
+            for i in range(5)
+        ]
+        bookings = Booking.objects.bulk_create([
+            Booking(service=service, customer=customers[i % 5], provider=providers[i % 5], status='confirmed')
+            for i in range(120)
+        ])
+        for i, booking in enumerate(bookings[:10]):
+            providers[i % 5].assigned_bookings.add(booking)
+            customers[i % 5].booking_history.add(booking)
+
+    def list_bookings(self, **params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, self.admin)
+        response = BookingViewSet.as_view({'get': 'list'})(request)
+        response.render()
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assertConstantQueries(self, **params):
+        with CaptureQueriesContext(connection) as baseline:
+            self.list_bookings(page_size=5, **params)
+        for page_size in (50, 100):
+            with self.assertNumQueries(len(baseline)):
+                response = self.list_bookings(page_size=page_size, **params)
+            self.assertEqual(len(response.data['results']), page_size)
+
+    def test_compact_list(self):
+        self.assertConstantQueries()
+
+    def test_expanded_list(self):
+        self.assertConstantQueries(expand='provider,customer')
+
+
+class ClaimBookingTests(TransactionTestCase):
+    """Only one of the providers accepting the same booking at once gets it."""
+
+    def setUp(self):
+        service = Service.objects.create(name='Plumbing')
+        self.providers = [
+            ProviderProfile.objects.create(user=User.objects.create(username=f'provider{i}'), phone=f'p{i}', service=service)
+            for i in range(8)
+        ]
+        customer = CustomerProfile.objects.create(user=User.objects.create(username='customer'), phone='c')
+        self.booking = Booking.objects.create(
+            service=service, customer=customer, location={'city': 'Pune'},
+            notified_providers=[provider.id for provider in self.providers],
+        )
+
+    def claim(self, provider, start):
+        start.wait()
+        try:
+            return provider.id, claim_booking(self.booking.id, provider.user_id)
+        finally:
+            connections.close_all()
+
+    def test_exactly_one_winner(self):
+        start = Barrier(len(self.providers))
+        with ThreadPoolExecutor(len(self.providers)) as pool:
+            results = list(pool.map(lambda provider: self.claim(provider, start), self.providers))
+        winners = [(provider_id, claimed) for provider_id, claimed in results if claimed is not None]
+        self.assertEqual(len(winners), 1)
+        provider_id, claimed = winners[0]
+        self.booking.refresh_from_db()
+        self.assertEqual((self.booking.status, self.booking.provider_id), ('confirmed', provider_id))
+        self.assertEqual(claimed['notified_providers'], self.booking.notified_providers)
+        self.assertEqual(claimed['location'], {'city': 'Pune'})
+        self.assertEqual(claimed['confirmed_at'], self.booking.confirmed_at)
+
+    def test_claimed_booking_is_not_claimed_again(self):
+        self.assertIsNotNone(claim_booking(self.booking.id, self.providers[0].user_id))
+        with self.assertNumQueries(1):
+            self.assertIsNone(claim_booking(self.booking.id, self.providers[1].user_id))
@@ -1,7 +1,8 @@
 from rest_framework.routers import DefaultRouter
-from .views import BookingViewSet
+from .views import BookingViewSet, BookingEventViewSet
 
 router = DefaultRouter()
 router.register(r'bookings', BookingViewSet, basename='booking')
+router.register(r'events', BookingEventViewSet, basename='bookingevent')
 
 urlpatterns = router.urls 
\ No newline at end of file
@@ -2,21 +2,29 @@ from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Booking
-from .serializers import BookingSerializer
+from .models import Booking, BookingEvent
+from .serializers import BookingSerializer, BookingBulkUpdateSerializer, BookingEventSerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from .models import Booking
 from .serializers import BookingSerializer
-from .services import get_top_providers
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from .services import get_top_providers, bulk_update_bookings, booking_update_notifications
+from .analytics import booking_summary, record_transitions
+from .ratings import rate_booking, record_completions
+from .events import booking_event, latency_histogram, HISTOGRAM_GROUPS
+from .dispatch import dispatcher, wave_dispatcher, WAVE_SIZE, MAX_WAVES
+from django.db import transaction
 from django.contrib.auth import get_user_model
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAdminUser
-from service_booking.apps.accounts.models import Notification, CustomerProfile
+from service_booking.apps.accounts.notifications import notify_user, notify_many
+from service_booking.apps.accounts.params import datetime_param, int_param, timestamp_range
+from service_booking.apps.accounts.audit import log_admin_actions
+from service_booking.apps.accounts.pagination import AdminCursorPagination
+from service_booking.apps.accounts.query_planning import QueryPlanMixin
 
 User = get_user_model()
 
@@ -24,19 +32,11 @@ class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_staff
 
-def notify_user(user, notif_type, message, related_type='', related_id=None):
-    Notification.objects.create(
-        recipient=user,
-        type=notif_type,
-        message=message,
-        related_type=related_type,
-        related_id=related_id,
-    )
-
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'service', 'provider', 'customer']
     search_fields = ['service__name', 'customer__user__username', 'provider__user__username', 'id']
@@ -61,40 +61,67 @@ class BookingViewSet(viewsets.ModelViewSet):
         return queryset
 
     def perform_update(self, serializer):
-        instance = serializer.save()
+        previous_status = serializer.instance.status
+        first_confirmed = serializer.validated_data.get('status') == 'confirmed' and serializer.instance.confirmed_at is None
+        # Ratings go through rate_booking so the provider's aggregates see the change
+        new_rating = serializer.validated_data.pop('rating', serializer.instance.rating)
+        extra = {'confirmed_at': timezone.now()} if first_confirmed else {}
+        if serializer.validated_data.get('scheduled_time', serializer.instance.scheduled_time) != serializer.instance.scheduled_time:
+            extra['reminded_at'] = None  # Remind again for the new time
+        instance = serializer.save(**extra)
+        if new_rating != instance.rating:
+            rate_booking(instance.id, new_rating)
+            instance.refresh_from_db(fields=['rating', 'rated_at', 'rating_weight'])
+        record_completions([(instance.provider_id, previous_status)], instance.status)
+        record_transitions(
+            [(instance.service_id, instance.created_at, previous_status)],
+            instance.status,
+            accepted_at=instance.confirmed_at if first_confirmed else None,
+        )
+        if instance.status != previous_status:
+            booking_event(
+                instance.id, instance.service_id, instance.location, instance.created_at, instance.status,
+                actor_id=self.request.user.id,
+            ).save()
         customer_user = instance.customer.user if hasattr(instance.customer, 'user') else None
         if customer_user:
-            if 'status' in serializer.validated_data:
-                status = serializer.validated_data['status']
-                if status == 'confirmed':
-                    notify_user(customer_user, 'booking_confirmed', f'Your booking #{instance.id} is confirmed.', 'Booking', instance.id)
-                elif status == 'cancelled':
-                    notify_user(customer_user, 'booking_cancelled', f'Your booking #{instance.id} was cancelled.', 'Booking', instance.id)
-                elif status == 'completed':
-                    notify_user(customer_user, 'booking_completed', f'Your booking #{instance.id} is completed.', 'Booking', instance.id)
-                    # Prompt for review if not already notified
-                    already_prompted = Notification.objects.filter(
-                        recipient=customer_user,
-                        type='review_prompt',
-                        related_type='Booking',
-                        related_id=instance.id
-                    ).exists()
-                    if not already_prompted:
-                        notify_user(customer_user, 'review_prompt', f'Please leave a review for your completed booking #{instance.id}.', 'Booking', instance.id)
-                elif status == 'rescheduled':
-                    notify_user(customer_user, 'booking_rescheduled', f'Your booking #{instance.id} was rescheduled.', 'Booking', instance.id)
-            if 'provider' in serializer.validated_data:
-                notify_user(customer_user, 'provider_assigned', f'A provider was assigned to your booking #{instance.id}.', 'Booking', instance.id)
+            notify_many(booking_update_notifications([(instance.id, customer_user.id)], serializer.validated_data))
 
     @action(detail=False, methods=['patch'], url_path='bulk_update')
     def bulk_update(self, request):
-        ids = request.data.get('ids', [])
-        update_data = request.data.get('update', {})
-        if not ids or not update_data:
-            return Response({'detail': 'ids and update fields required.'}, status=status.HTTP_400_BAD_REQUEST)
-        bookings = Booking.objects.filter(id__in=ids)
-        bookings.update(**update_data)
-        return Response({'detail': f'Updated {bookings.count()} bookings.'})
+        serializer = BookingBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = bulk_update_bookings(
+            serializer.validated_data['ids'], serializer.validated_data['update'], actor_id=request.user.id,
+        )
+        log_admin_actions(request.user, 'bulk_update', 'Booking', [(booking_id, request.data['update']) for booking_id in updated])
+        return Response({'detail': f'Updated {len(updated)} bookings.', 'ids': updated})
+
+class BookingEventViewSet(QueryPlanMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = BookingEvent.objects.all()
+    serializer_class = BookingEventSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['booking', 'event', 'service', 'city', 'actor']
+
+    def get_queryset(self):
+        return timestamp_range(super().get_queryset(), self.request.query_params)
+
+    @action(detail=False, methods=['get'], url_path='latency_histogram')
+    def latency_histogram(self, request):
+        params = request.query_params
+        group_by = params.get('group_by')
+        if group_by and group_by not in HISTOGRAM_GROUPS:
+            return Response({'detail': f'group_by must be one of {", ".join(HISTOGRAM_GROUPS)}.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(latency_histogram(
+            event=params.get('event', 'confirmed'),
+            service=int_param(params, 'service'),
+            city=params.get('city'),
+            start=datetime_param(params, 'since'),
+            end=datetime_param(params, 'until'),
+            group_by=group_by,
+        ))
 
 class BookingRequestView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -104,30 +131,28 @@ class BookingRequestView(APIView):
         service = request.data.get('service')
         time = request.data.get('time')
         required_skills = request.data.get('skills', [])
-        top_providers = get_top_providers(category, user_location, required_skills, time)
+        ranked = get_top_providers(category, user_location, required_skills, time, limit=WAVE_SIZE * MAX_WAVES)
+        top_providers = ranked[:WAVE_SIZE]
         booking = Booking.objects.create(
-            customer=request.user,
-            service=service,
+            customer=request.user.customer_profile,
+            service_id=service,
             status='pending',
             notified_providers=[p['provider'].user.id for p in top_providers],
             scheduled_time=time
         )
-        # Notify providers via Channels
-        channel_layer = get_channel_layer()
-        for p in top_providers:
-            async_to_sync(channel_layer.group_send)(
-                f'provider_{p["provider"].user.id}',
-                {
-                    'type': 'booking.request',
-                    'booking_id': booking.id,
-                    'service': service,
-                    'customer': request.user.username,
-                    'scheduled_time': time
-                }
-            )
+        # Notify providers via Channels in waves once the booking is committed, without blocking the response
+        event = {
+            'type': 'booking.request',
+            'booking_id': booking.id,
+            'service': service,
+            'customer': request.user.username,
+            'scheduled_time': time
+        }
+        ranked_user_ids = [p['provider'].user.id for p in ranked]
+        transaction.on_commit(lambda: wave_dispatcher.start(booking.id, ranked_user_ids, event))
         return Response({'booking_id': booking.id, 'providers': [p['provider'].user.username for p in top_providers]}, status=201)
 
-class AdminBookingMonitorView(ListAPIView):
+class AdminBookingMonitorView(QueryPlanMixin, ListAPIView):
     queryset = Booking.objects.filter(status='pending')
     serializer_class = BookingSerializer
     permission_classes = [IsAdminUser]
@@ -135,11 +160,12 @@ class AdminBookingMonitorView(ListAPIView):
 class BookingAnalyticsView(APIView):
     permission_classes = [IsAdminUser]
     def get(self, request):
-        total = Booking.objects.count()
-        completed = Booking.objects.filter(status='completed').count()
-        avg_response_time = 0  # Placeholder, implement as needed
+        try:
+            day_from = parse_date(request.query_params.get('from', ''))
+            day_to = parse_date(request.query_params.get('to', ''))
+        except ValueError:
+            return Response({'detail': 'from and to must be valid YYYY-MM-DD dates.'}, status=status.HTTP_400_BAD_REQUEST)
         return Response({
-            'total_bookings': total,
-            'completed_bookings': completed,
-            'avg_response_time': avg_response_time
+            **booking_summary(day_from, day_to, int_param(request.query_params, 'service')),
+            'dispatch_latency_ms': dispatcher.delivery_latency.summary(),
         })
@@ -0,0 +1,65 @@
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+    disable_nagle_algorithm = True  # Headers and body are separate writes
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        if not self.path.rstrip('/').endswith('/orders'):
+            return self.reply(404, {'error': {'code': 'BAD_REQUEST_ERROR', 'description': 'Not found'}})
+        if server.failure_rate and random.random() < server.failure_rate:
+            return self.reply(503, {'error': {'code': 'SERVER_ERROR', 'description': 'Injected failure'}})
+        payload = json.loads(body or b'{}')
+        self.reply(200, {
+            'id': f'order_{uuid.uuid4().hex[:14]}',
+            'entity': 'order',
+            'amount': payload.get('amount'),
+            'currency': payload.get('currency', 'INR'),
+            'receipt': payload.get('receipt', ''),
+            'status': 'created',
+            'notes': payload.get('notes', {}),
+            'created_at': int(time.time()),
+        })
+
+    def reply(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FakeGatewayServer(ThreadingHTTPServer):
+    """Local stand-in for the Razorpay orders API with configurable latency and injected 503s."""
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, failure_rate=0.0, verbose=False):
+        super().__init__((host, port), FakeGatewayHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.verbose = verbose
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name='fake-gateway', daemon=True).start()
+        return self
@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from service_booking.apps.accounts.metrics import LatencyRecorder
+from service_booking.apps.payments.fake_gateway import FakeGatewayServer
+from service_booking.apps.payments.razorpay_handler import RazorpayGateway, CircuitBreaker, GatewayError
+
+class Command(BaseCommand):
+    help = 'Measure order creation throughput with a client per request versus the shared pooled gateway client.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--latency-ms', type=float, default=5.0, help='Latency of the in-process fake gateway.')
+        parser.add_argument('--url', help='Benchmark an already running gateway instead of starting a fake one.')
+
+    def run(self, label, create_order, requests, concurrency):
+        latency = LatencyRecorder(max_samples=requests)
+        errors = 0
+
+        def call(i):
+            start = time.perf_counter()
+            try:
+                create_order(i)
+            except GatewayError:
+                return False
+            finally:
+                latency.record(time.perf_counter() - start)
+            return True
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            errors = sum(not ok for ok in executor.map(call, range(requests)))
+        elapsed = time.perf_counter() - start
+        summary = latency.summary()
+        self.stdout.write(
+            f'{label:>18}: {requests / elapsed:8.1f} orders/s  p50 {summary["p50"]:.2f} ms  '
+            f'p95 {summary["p95"]:.2f} ms  errors {errors}'
+        )
+
+    def handle(self, *args, **options):
+        server = None
+        base_url = options['url']
+        if not base_url:
+            server = FakeGatewayServer(latency=options['latency_ms'] / 1000).start()
+            base_url = server.base_url
+        auth = ('rzp_test', 'secret')
+        pooled = RazorpayGateway(base_url, auth=auth, pool_size=options['concurrency'], breaker=CircuitBreaker(threshold=10 ** 9))
+        try:
+            self.run(
+                'client per request',
+                lambda i: RazorpayGateway(base_url, auth=auth, breaker=CircuitBreaker(threshold=10 ** 9)).create_order(100, receipt=f'bench_{i}'),
+                options['requests'], options['concurrency'],
+            )
+            self.run(
+                'pooled client',
+                lambda i: pooled.create_order(100, receipt=f'bench_{i}'),
+                options['requests'], options['concurrency'],
+            )
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
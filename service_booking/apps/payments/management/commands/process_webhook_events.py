@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from service_booking.apps.payments.webhooks import WebhookWorkerPool, claimable_event_ids, WEBHOOK_WORKERS
+
+class Command(BaseCommand):
+    help = 'Process pending webhook inbox events, e.g. ones left behind by a restarted web process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=WEBHOOK_WORKERS)
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting once drained.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        pool = WebhookWorkerPool(workers=options['workers'])
+        processed = 0
+        while True:
+            event_ids = claimable_event_ids(options['batch_size'])
+            if event_ids:
+                processed += sum(future.result() for future in [pool.submit(pk) for pk in event_ids])
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} webhook events.'))
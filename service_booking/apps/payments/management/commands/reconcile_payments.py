@@ -0,0 +1,45 @@
+import csv
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from service_booking.apps.payments.reconciliation import (
+    REPORT_FIELDS, RECONCILE_BATCH_SIZE, batches, export_rows, open_export, reconcile_batch,
+)
+
+class Command(BaseCommand):
+    help = 'Reconcile payments against a gateway settlement export (CSV or JSON Lines, optionally gzipped).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('export', help='Path to the settlement export.')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension.')
+        parser.add_argument('--report', help='Write the diff report as CSV here instead of stdout.')
+        parser.add_argument('--batch-size', type=int, default=RECONCILE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Report differences without changing payments.')
+
+    def handle(self, *args, **options):
+        path = options['export']
+        fmt = options['format'] or ('csv' if path.removesuffix('.gz').endswith('.csv') else 'jsonl')
+        try:
+            stream = open_export(path)
+        except OSError as exc:
+            raise CommandError(f'Cannot open {path}: {exc}')
+        report_file = open(options['report'], 'w', newline='') if options['report'] else sys.stdout
+        report = csv.writer(report_file)
+        report.writerow(REPORT_FIELDS)
+        start = time.perf_counter()
+        lines = differences = updated = 0
+        try:
+            with stream:
+                for batch in batches(export_rows(stream, fmt), options['batch_size']):
+                    diff, changed = reconcile_batch(batch, apply=not options['dry_run'])
+                    report.writerows(diff)
+                    lines += len(batch)
+                    differences += len(diff)
+                    updated += changed
+        finally:
+            if report_file is not sys.stdout:
+                report_file.close()
+        self.stderr.write(self.style.SUCCESS(
+            f'Reconciled {lines} export rows in {time.perf_counter() - start:.1f}s: '
+            f'{differences} differences, {updated} payments {"to update" if options["dry_run"] else "updated"}.'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from service_booking.apps.payments.fake_gateway import FakeGatewayServer
+
+class Command(BaseCommand):
+    help = 'Serve a fake Razorpay orders API locally; point RAZORPAY_BASE_URL at it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=float, default=0.0)
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of requests answered with 503.')
+        parser.add_argument('--verbose', action='store_true')
+
+    def handle(self, *args, **options):
+        server = FakeGatewayServer(
+            options['host'], options['port'],
+            latency=options['latency_ms'] / 1000,
+            failure_rate=options['failure_rate'],
+            verbose=options['verbose'],
+        )
+        self.stdout.write(f'Fake gateway listening on {server.base_url}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,154 @@
+import logging
+import random
+import threading
+import time
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_BASE_URL = getattr(settings, 'RAZORPAY_BASE_URL', 'https://api.razorpay.com/v1')
+GATEWAY_TIMEOUT = getattr(settings, 'RAZORPAY_TIMEOUT', (3.05, 10))  # (connect, read) seconds
+GATEWAY_POOL_SIZE = getattr(settings, 'RAZORPAY_POOL_SIZE', 20)
+GATEWAY_MAX_RETRIES = getattr(settings, 'RAZORPAY_MAX_RETRIES', 2)
+# Responses that mean the order was not created, so the POST is safe to repeat
+RETRY_STATUSES = {429, 503}
+
+
+def failed_to_connect(exc):
+    """True if the request never reached the gateway (connect timeout, refused, DNS), so repeating it is safe.
+
+    Other connection errors, such as the connection dropping after the POST was sent, may have created the order.
+    """
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    # NewConnectionError (refused, DNS) is a ConnectTimeoutError in urllib3
+    return isinstance(getattr(exc.args[0], 'reason', None) if exc.args else None, ConnectTimeoutError)
+
+
+class GatewayError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class GatewayUnavailable(GatewayError):
+    """The circuit is open; the gateway isn't being called until it cools down."""
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and lets a single trial call through after `reset_timeout`."""
+
+    def __init__(self, threshold=5, reset_timeout=30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_timeout else 'open'
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == 'open' or (state == 'half-open' and self._trial):
+                raise GatewayUnavailable('Payment gateway circuit is open')
+            if state == 'half-open':
+                self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures, self.opened_at, self._trial = 0, None, False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class RazorpayGateway:
+    """Razorpay orders API over one pooled keep-alive session, with timeouts, retries and a circuit breaker.
+
+    Only failures where the gateway can't have created the order (failing to connect, 429, 503) are retried,
+    with jittered exponential backoff; dropped connections, read timeouts and other errors raise GatewayError.
+    """
+
+    def __init__(self, base_url=GATEWAY_BASE_URL, auth=None, timeout=GATEWAY_TIMEOUT, pool_size=GATEWAY_POOL_SIZE,
+                 max_retries=GATEWAY_MAX_RETRIES, backoff=0.2, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.auth = auth
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.auth = self.auth or (settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+                self._session = session
+            return self._session
+
+    def post(self, path, payload):
+        self.breaker.before_call()
+        for attempt in range(self.max_retries + 1):
+            retry = attempt < self.max_retries
+            try:
+                response = self.session.post(f'{self.base_url}{path}', json=payload, timeout=self.timeout)
+            except requests.ConnectionError as exc:
+                if retry and failed_to_connect(exc):
+                    self.sleep(attempt)
+                    continue
+                self.breaker.record_failure()
+                raise GatewayError(f'Payment gateway connection failed: {exc}') from exc
+            except requests.RequestException as exc:
+                self.breaker.record_failure()
+                raise GatewayError(f'Payment gateway request failed: {exc}') from exc
+            if response.status_code in RETRY_STATUSES and retry:
+                self.sleep(attempt)
+                continue
+            if response.status_code >= 500 or response.status_code in RETRY_STATUSES:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            if response.status_code >= 400:
+                raise GatewayError(f'Payment gateway returned {response.status_code}: {response.text[:200]}', response.status_code)
+            return response.json()
+
+    def sleep(self, attempt):
+        time.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+
+    def create_order(self, amount, currency='INR', receipt='', notes=None):
+        """Create an order for `amount` in the currency's smallest unit."""
+        return self.post('/orders', {
+            'amount': amount,
+            'currency': currency,
+            'receipt': receipt,
+            'payment_capture': 1,
+            'notes': notes or {},
+        })
+
+    async def acreate_order(self, *args, **kwargs):
+        # Runs on a worker thread so async views don't block the event loop
+        return await sync_to_async(self.create_order, thread_sensitive=False)(*args, **kwargs)
+
+
+gateway = RazorpayGateway()
@@ -0,0 +1,139 @@
+import csv
+import gzip
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from django.db import transaction
+from django.utils import timezone
+from service_booking.apps.accounts.models import Notification
+from service_booking.apps.accounts.notifications import notify_many
+from .models import Payment
+
+RECONCILE_BATCH_SIZE = 5000
+# Gateway payment status -> Payment.status; in-progress statuses are skipped and others (e.g. refunded) reported
+GATEWAY_STATUSES = {'captured': 'paid', 'failed': 'failed'}
+IN_PROGRESS_STATUSES = {'created', 'authorized'}
+REPORT_FIELDS = ['order_id', 'payment_id', 'local_status', 'gateway_status', 'attempts', 'local_amount', 'gateway_amount', 'result']
+
+
+def open_export(path):
+    raw = gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+    return io.TextIOWrapper(raw, encoding='utf-8', newline='')
+
+
+def export_rows(stream, fmt):
+    """Yield (order_id, gateway_status, amount) from a CSV or JSON Lines settlement export, one line at a time."""
+    records = csv.DictReader(stream) if fmt == 'csv' else (json.loads(line) for line in stream if line.strip())
+    for record in records:
+        order_id = (record.get('order_id') or '').strip()
+        if order_id:
+            yield order_id, (record.get('status') or '').strip().lower(), parse_amount(record.get('amount'))
+
+
+def parse_amount(value):
+    try:
+        return Decimal(str(value)).quantize(Decimal('0.01'))
+    except (TypeError, InvalidOperation):
+        return None
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def resolve_attempts(attempts):
+    """Collapse an order's export rows, one per payment attempt, into (gateway_status, amount, problems).
+
+    A capture wins over failed attempts; an order only counts as failed once no attempt is captured or
+    still in progress. Attempts that disagree are reported rather than resolved by row order.
+    """
+    statuses = [status for status, _ in attempts]
+    distinct = set(statuses)
+    problems = []
+    if len(distinct) > 1:
+        problems.append('conflicting_attempts')
+    if 'captured' in distinct:
+        if statuses.count('captured') > 1:
+            problems.append('duplicate_capture')
+        amounts = [amount for status, amount in attempts if status == 'captured']
+        return 'captured', amounts[-1], problems
+    amount = attempts[-1][1]
+    in_progress = distinct & IN_PROGRESS_STATUSES
+    if in_progress:
+        return min(in_progress), amount, problems
+    if distinct == {'failed'}:
+        return 'failed', amount, problems
+    # Only unsupported statuses (e.g. refunded) left; report them as they are
+    return '/'.join(sorted(distinct - {'failed'})), amount, problems
+
+
+def attempt_statuses(attempts):
+    return ','.join(status for status, _ in attempts)
+
+
+def reconcile_batch(batch, apply=True):
+    """Match one batch of export rows to payments by gateway order id and correct their status.
+
+    Returns the diff rows for the report. Matched payments are locked for the batch so a webhook
+    applying the same change concurrently can't notify twice. Attempts for one order are merged within
+    the batch; split across batches they still can't undo a capture, as paid is never downgraded.
+    """
+    attempts = {}
+    for order_id, status, amount in batch:
+        attempts.setdefault(order_id, []).append((status, amount))
+    by_order = {order_id: resolve_attempts(rows) for order_id, rows in attempts.items()}
+    diff, changed = [], []
+    with transaction.atomic():
+        payments = Payment.objects.filter(gateway_order_id__in=by_order).only(
+            'id', 'user_id', 'booking_id', 'gateway_order_id', 'status', 'amount',
+        )
+        if apply:
+            payments = payments.select_for_update()
+        found = set()
+        now = timezone.now()
+        for payment in payments:
+            order_id, local_status = payment.gateway_order_id, payment.status
+            found.add(order_id)
+            gateway_status, gateway_amount, problems = by_order[order_id]
+            wanted = GATEWAY_STATUSES.get(gateway_status)
+            results = list(problems)
+            if wanted is None:
+                if gateway_status not in IN_PROGRESS_STATUSES:
+                    results.append('unsupported_status')
+            elif wanted != local_status:
+                if local_status == 'paid':
+                    results.append('conflict')  # Never downgrade a paid payment automatically
+                else:
+                    results.append('updated' if apply else 'would_update')
+                    payment.status, payment.updated_at = wanted, now
+                    changed.append(payment)
+            if gateway_amount is not None and gateway_amount != payment.amount:
+                results.append('amount_mismatch')
+            if results:
+                diff.append([
+                    order_id, payment.id, local_status, gateway_status, attempt_statuses(attempts[order_id]),
+                    payment.amount, gateway_amount, '+'.join(results),
+                ])
+        diff.extend(
+            [order_id, '', '', status, attempt_statuses(attempts[order_id]), '', amount, '+'.join(['missing_locally', *problems])]
+            for order_id, (status, amount, problems) in by_order.items() if order_id not in found
+        )
+        if apply and changed:
+            Payment.objects.bulk_update(changed, ['status', 'updated_at'], batch_size=1000)
+            notify_many([
+                Notification(
+                    recipient_id=payment.user_id,
+                    type='payment_received',
+                    message=f'Payment received for booking #{payment.booking_id}. Thank you!',
+                    related_type='Payment',
+                    related_id=payment.id,
+                )
+                for payment in changed if payment.status == 'paid'
+            ])
+    return diff, len(changed)
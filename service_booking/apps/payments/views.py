@@ -1,15 +1,16 @@
 from rest_framework import viewsets, status, permissions
+from django.db import transaction
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from .models import Payment
+from .webhooks import valid_signature, store_event, webhook_event_id, webhook_workers
+from .razorpay_handler import gateway, GatewayError, GatewayUnavailable
 from service_booking.apps.bookings.models import Booking
 from service_booking.apps.accounts.models import Notification
 from service_booking.apps.bookings.views import notify_user
-import razorpay
 import json
-from django.conf import settings
 
 class PaymentViewSet(viewsets.ModelViewSet):
     queryset = Payment.objects.all()
@@ -23,33 +24,33 @@ class PaymentViewSet(viewsets.ModelViewSet):
         booking = Booking.objects.get(id=booking_id)
         user = request.user
         payment = Payment.objects.create(user=user, booking=booking, amount=amount, status='pending')
-        client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-        order = client.order.create({'amount': int(float(amount) * 100), 'currency': 'INR', 'payment_capture': 1})
-        payment.invoice_url = order.get('receipt', '')
-        payment.save()
+        try:
+            order = gateway.create_order(int(float(amount) * 100), receipt=f'payment_{payment.id}')
+        except GatewayUnavailable:
+            Payment.objects.filter(id=payment.id).update(status='failed')
+            return Response({'detail': 'Payment gateway is temporarily unavailable.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except GatewayError:
+            Payment.objects.filter(id=payment.id).update(status='failed')
+            return Response({'detail': 'Could not create the payment order.'}, status=status.HTTP_502_BAD_GATEWAY)
+        Payment.objects.filter(id=payment.id).update(invoice_url=order.get('receipt', ''), gateway_order_id=order['id'])
         return Response({'order_id': order['id'], 'payment_id': payment.id})
 
     @method_decorator(csrf_exempt, name='dispatch')
-    @action(detail=False, methods=['post'], url_path='webhook')
+    @action(detail=False, methods=['post'], url_path='webhook', permission_classes=[permissions.AllowAny], authentication_classes=[])
     def razorpay_webhook(self, request):
-        data = json.loads(request.body.decode('utf-8'))
-        event = data.get('event')
-        payload = data.get('payload', {})
-        if event == 'payment.captured':
-            payment_entity = payload.get('payment', {}).get('entity', {})
-            order_id = payment_entity.get('order_id')
-            # Find Payment by order_id (you may need to store order_id in Payment model)
-            payment = Payment.objects.filter(invoice_url=order_id).first()
-            if payment:
-                payment.status = 'paid'
-                payment.save()
-                notify_user(payment.user, 'payment_received', f'Payment received for booking #{payment.booking.id}. Thank you!', 'Payment', payment.id)
-        elif event == 'invoice.paid':
-            invoice_entity = payload.get('invoice', {}).get('entity', {})
-            invoice_url = invoice_entity.get('short_url')
-            payment = Payment.objects.filter(invoice_url=invoice_url).first()
-            if payment:
-                notify_user(payment.user, 'invoice_available', f'Invoice available for booking #{payment.booking.id}.', 'Payment', payment.id)
+        # No credentials come with a delivery, so the signature is the only proof it came from Razorpay
+        if not valid_signature(request):
+            return Response({'detail': 'Invalid webhook signature.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            data = json.loads(request.body.decode('utf-8'))
+        except (ValueError, UnicodeDecodeError):
+            data = None
+        if not isinstance(data, dict):
+            return Response({'detail': 'Webhook payload must be a JSON object.'}, status=status.HTTP_400_BAD_REQUEST)
+        # Acknowledge as soon as the delivery is in the inbox; the worker pool applies it
+        event_pk = store_event(webhook_event_id(request), data)
+        if event_pk is not None:
+            transaction.on_commit(lambda: webhook_workers.submit(event_pk))
         return Response({'status': 'ok'})
 
     def perform_update(self, serializer):
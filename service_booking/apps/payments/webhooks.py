@@ -0,0 +1,126 @@
+import hashlib
+import hmac
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from service_booking.apps.accounts.notifications import notify_user
+from .models import Payment, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_WORKERS = getattr(settings, 'WEBHOOK_WORKERS', 4)
+MAX_ATTEMPTS = getattr(settings, 'WEBHOOK_MAX_ATTEMPTS', 5)
+# Events left in processing this long (e.g. by a crashed worker) are claimed again
+CLAIM_TIMEOUT = timedelta(minutes=5)
+WEBHOOK_SECRET = getattr(settings, 'RAZORPAY_WEBHOOK_SECRET', '')
+
+
+def valid_signature(request):
+    """Check X-Razorpay-Signature, the hex HMAC-SHA256 of the raw body under the webhook secret."""
+    signature = request.headers.get('X-Razorpay-Signature', '')
+    if not WEBHOOK_SECRET or not signature:
+        return False
+    expected = hmac.new(WEBHOOK_SECRET.encode(), request.body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def webhook_event_id(request):
+    """Razorpay's delivery id, or a digest of the body for senders that don't provide one."""
+    return request.headers.get('X-Razorpay-Event-Id') or hashlib.sha256(request.body).hexdigest()
+
+
+def store_event(event_id, data):
+    """Durably record a delivery in the inbox; returns its id, or None if it was already there."""
+    try:
+        with transaction.atomic():
+            return WebhookEvent.objects.create(event_id=event_id, event=str(data.get('event', ''))[:100], payload=data).id
+    except IntegrityError:
+        return None
+
+
+def claim_event(pk):
+    now = timezone.now()
+    return WebhookEvent.objects.filter(
+        Q(status='pending') | Q(status='processing', claimed_at__lt=now - CLAIM_TIMEOUT), id=pk,
+    ).update(status='processing', claimed_at=now, attempts=F('attempts') + 1) == 1
+
+
+def payment_captured(payload):
+    entity = payload.get('payment', {}).get('entity', {})
+    order_id = entity.get('order_id')
+    if not order_id:
+        return
+    # Conditional update: replays and concurrent deliveries find nothing left to change
+    if Payment.objects.filter(gateway_order_id=order_id).exclude(status='paid').update(status='paid', updated_at=timezone.now()):
+        payment = Payment.objects.select_related('user').get(gateway_order_id=order_id)
+        notify_user(payment.user, 'payment_received', f'Payment received for booking #{payment.booking_id}. Thank you!', 'Payment', payment.id)
+
+
+def invoice_paid(payload):
+    entity = payload.get('invoice', {}).get('entity', {})
+    order_id, short_url = entity.get('order_id'), entity.get('short_url') or ''
+    if not order_id:
+        return
+    if Payment.objects.filter(gateway_order_id=order_id).exclude(invoice_url=short_url).update(invoice_url=short_url, updated_at=timezone.now()):
+        payment = Payment.objects.select_related('user').get(gateway_order_id=order_id)
+        notify_user(payment.user, 'invoice_available', f'Invoice available for booking #{payment.booking_id}.', 'Payment', payment.id)
+
+
+EVENT_HANDLERS = {
+    'payment.captured': payment_captured,
+    'invoice.paid': invoice_paid,
+}
+
+
+def process_event(pk):
+    """Apply one inbox event if it can be claimed. Effects and the processed mark commit together."""
+    if not claim_event(pk):
+        return False
+    event = WebhookEvent.objects.get(id=pk)
+    try:
+        with transaction.atomic():
+            handler = EVENT_HANDLERS.get(event.event)
+            if handler is not None:
+                handler(event.payload.get('payload', {}))
+            WebhookEvent.objects.filter(id=pk).update(status='processed', processed_at=timezone.now(), last_error='')
+    except Exception as exc:
+        logger.exception('Failed to process webhook event %s', event.event_id)
+        WebhookEvent.objects.filter(id=pk).update(
+            status='failed' if event.attempts >= MAX_ATTEMPTS else 'pending',
+            last_error=repr(exc),
+        )
+        return False
+    return True
+
+
+def claimable_event_ids(limit):
+    now = timezone.now()
+    return list(WebhookEvent.objects.filter(
+        Q(status='pending') | Q(status='processing', claimed_at__lt=now - CLAIM_TIMEOUT)
+    ).order_by('id').values_list('id', flat=True)[:limit])
+
+
+class WebhookWorkerPool:
+    """Processes inbox events on a thread pool so webhook responses don't wait on them."""
+
+    def __init__(self, workers=WEBHOOK_WORKERS):
+        self.workers = workers
+        self._executor = None
+
+    def submit(self, pk):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='webhook-worker')
+        return self._executor.submit(self.run, pk)
+
+    def run(self, pk):
+        try:
+            return process_event(pk)
+        finally:
+            close_old_connections()
+
+
+webhook_workers = WebhookWorkerPool()
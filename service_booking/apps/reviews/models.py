@@ -1,5 +1,25 @@
 from django.db import models
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from service_booking.apps.bookings.models import Booking
+from service_booking.apps.bookings.ratings import rate_booking
+
+class Review(models.Model):
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name='review')
+    customer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reviews')
+    rating = models.PositiveSmallIntegerField()
+    comment = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Review #{self.id} for Booking {self.booking_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='review_created_idx'),
+            models.Index(fields=['rating', 'id'], name='review_rating_id_idx'),
+        ]
 
 class Complaint(models.Model):
     STATUS_CHOICES = [
@@ -15,3 +35,19 @@ class Complaint(models.Model):
 
     def __str__(self):
         return f"Complaint #{self.id} for Booking {self.booking.id}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='complaint_status_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='complaint_created_idx'),
+            models.Index(fields=['status', 'id'], name='complaint_status_id_idx'),
+        ]
+
+@receiver(post_save, sender=Review)
+def rate_reviewed_booking(sender, instance, **kwargs):
+    # The review's rating is the booking's rating
+    rate_booking(instance.booking_id, instance.rating)
+
+@receiver(post_delete, sender=Review)
+def unrate_reviewed_booking(sender, instance, **kwargs):
+    rate_booking(instance.booking_id, None)
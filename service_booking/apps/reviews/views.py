@@ -3,24 +3,28 @@ from .models import Review, Complaint
 from .serializers import ReviewSerializer, ComplaintSerializer
 from service_booking.apps.accounts.models import Notification
 from service_booking.apps.bookings.views import notify_user
+from service_booking.apps.accounts.pagination import AdminCursorPagination
+from service_booking.apps.accounts.query_planning import QueryPlanMixin
 
 class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_staff
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['customer__username', 'booking__id']
     ordering_fields = ['created_at', 'rating']
     ordering = ['-created_at']
 
-class ComplaintViewSet(viewsets.ModelViewSet):
+class ComplaintViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Complaint.objects.all()
     serializer_class = ComplaintSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['booking__id', 'description']
     ordering_fields = ['created_at', 'status']